@@ -0,0 +1,38 @@
+"""index ticket_messages/attachments by (ticket_id, created_at)
+
+Revision ID: 0a7c5e2b9d36
+Revises: f6a3d8b1c245
+Create Date: 2026-10-17 15:11:08.290455
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7c5e2b9d36'
+down_revision: Union[str, Sequence[str], None] = 'f6a3d8b1c245'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # o detalhe do ticket busca mensagens e anexos por ticket_id, em ordem; sem índice era seq scan
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_ticket_messages_ticket_id_created_at_id', 'ticket_messages',
+            ['ticket_id', 'created_at', 'id'], postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_attachments_ticket_id_created_at', 'attachments',
+            ['ticket_id', 'created_at'], postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attachments_ticket_id_created_at', table_name='attachments')
+    op.drop_index('ix_ticket_messages_ticket_id_created_at_id', table_name='ticket_messages')
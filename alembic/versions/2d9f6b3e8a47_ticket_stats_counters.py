@@ -0,0 +1,141 @@
+"""ticket_stats: contadores por status/responsável mantidos por trigger + tickets.first_response_at
+
+Revision ID: 2d9f6b3e8a47
+Revises: 0a7c5e2b9d36
+Create Date: 2026-10-17 16:02:41.733190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d9f6b3e8a47'
+down_revision: Union[str, Sequence[str], None] = '0a7c5e2b9d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# linhas por (status, responsável): espalha as escritas concorrentes (ex.: vários tickets novos
+# em "open" sem responsável) em vez de todas disputarem o lock da mesma linha
+SHARDS = 8
+RANDOM_SHARD = f"floor(random() * {SHARDS})::smallint"
+
+# agrega os deltas `d` (status, assignee_id, sign, created_at, first_response_at) de um statement
+APPLY_DELTAS = """
+    INSERT INTO ticket_stats AS s
+        (status, assignee_id, shard, tickets, created_epoch_sum, responded, first_response_seconds_sum)
+    SELECT d.status, d.assignee_id, {shard},
+           sum(d.sign),
+           sum(d.sign * extract(epoch FROM d.created_at)::bigint),
+           coalesce(sum(d.sign) FILTER (WHERE d.first_response_at IS NOT NULL), 0),
+           coalesce(sum(d.sign * extract(epoch FROM d.first_response_at - d.created_at)::bigint), 0)
+    FROM ({deltas}) d
+    GROUP BY d.status, d.assignee_id
+    ON CONFLICT (status, assignee_id, shard) DO UPDATE SET
+        tickets = s.tickets + EXCLUDED.tickets,
+        created_epoch_sum = s.created_epoch_sum + EXCLUDED.created_epoch_sum,
+        responded = s.responded + EXCLUDED.responded,
+        first_response_seconds_sum = s.first_response_seconds_sum + EXCLUDED.first_response_seconds_sum
+"""
+DELTA_COLUMNS = "{t}.status, {t}.assignee_id, {sign} AS sign, {t}.created_at, {t}.first_response_at"
+CHANGED = """
+    FROM old_rows o JOIN new_rows n ON n.id = o.id
+    WHERE (o.status, o.assignee_id, o.created_at, o.first_response_at)
+        IS DISTINCT FROM (n.status, n.assignee_id, n.created_at, n.first_response_at)
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tickets', sa.Column('first_response_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_table(
+        'ticket_stats',
+        sa.Column('status', postgresql.ENUM(name='ticketstatus', create_type=False), nullable=False),
+        sa.Column('assignee_id', sa.UUID(), nullable=True),
+        sa.Column('shard', sa.SmallInteger(), nullable=False),
+        sa.Column('tickets', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('created_epoch_sum', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('responded', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('first_response_seconds_sum', sa.BigInteger(), server_default='0', nullable=False),
+        sa.UniqueConstraint(
+            'status', 'assignee_id', 'shard', name='uq_ticket_stats_key', postgresql_nulls_not_distinct=True
+        ),
+    )
+
+    # primeira resposta = primeira mensagem (mensagens são sempre de agentes/admins)
+    op.execute("""
+        UPDATE tickets t SET first_response_at = m.first_at
+        FROM (SELECT ticket_id, min(created_at) AS first_at FROM ticket_messages GROUP BY ticket_id) m
+        WHERE t.id = m.ticket_id
+    """)
+    op.execute("""
+        CREATE FUNCTION ticket_messages_first_response() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE tickets t SET first_response_at = m.first_at
+            FROM (SELECT ticket_id, min(created_at) AS first_at FROM new_rows GROUP BY ticket_id) m
+            WHERE t.id = m.ticket_id AND t.first_response_at IS NULL;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER ticket_messages_first_response
+        AFTER INSERT ON ticket_messages REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION ticket_messages_first_response()
+    """)
+
+    # triggers por statement com tabelas de transição: um INSERT/UPDATE em lote (importação, bulk)
+    # vira um upsert por (status, responsável), não um por ticket
+    inserted = APPLY_DELTAS.format(
+        deltas=f"SELECT {DELTA_COLUMNS.format(t='n', sign=1)} FROM new_rows n", shard=RANDOM_SHARD
+    )
+    deleted = APPLY_DELTAS.format(
+        deltas=f"SELECT {DELTA_COLUMNS.format(t='o', sign=-1)} FROM old_rows o", shard=RANDOM_SHARD
+    )
+    updated = APPLY_DELTAS.format(deltas=(
+        f"SELECT {DELTA_COLUMNS.format(t='n', sign=1)} {CHANGED}"
+        f" UNION ALL SELECT {DELTA_COLUMNS.format(t='o', sign=-1)} {CHANGED}"
+    ), shard=RANDOM_SHARD)
+    op.execute(f"""
+        CREATE FUNCTION ticket_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {inserted};
+            ELSIF TG_OP = 'UPDATE' THEN
+                {updated};
+            ELSE
+                {deleted};
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    for event, tables in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        op.execute(f"""
+            CREATE TRIGGER ticket_stats_{event.lower()}
+            AFTER {event} ON tickets REFERENCING {tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION ticket_stats_apply()
+        """)
+
+    # carga inicial; CREATE TRIGGER já segura o lock que bloqueia escritas em tickets até o commit
+    op.execute(APPLY_DELTAS.format(
+        deltas=f"SELECT {DELTA_COLUMNS.format(t='t', sign=1)} FROM tickets t", shard="0::smallint"
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in ("insert", "update", "delete"):
+        op.execute(f"DROP TRIGGER IF EXISTS ticket_stats_{event} ON tickets")
+    op.execute("DROP FUNCTION IF EXISTS ticket_stats_apply()")
+    op.execute("DROP TRIGGER IF EXISTS ticket_messages_first_response ON ticket_messages")
+    op.execute("DROP FUNCTION IF EXISTS ticket_messages_first_response()")
+    op.drop_table('ticket_stats')
+    op.drop_column('tickets', 'first_response_at')
@@ -0,0 +1,33 @@
+"""add tickets (created_at, id) index for keyset pagination
+
+Revision ID: 4e1b7c9d2a10
+Revises: f3fcd1d54144
+Create Date: 2026-10-17 09:12:04.511203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e1b7c9d2a10'
+down_revision: Union[str, Sequence[str], None] = 'f3fcd1d54144'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_tickets_created_at_id',
+        'tickets',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tickets_created_at_id', table_name='tickets')
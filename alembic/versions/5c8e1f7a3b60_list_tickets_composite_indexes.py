@@ -0,0 +1,59 @@
+"""composite/partial indexes for list_tickets; drop single-column status/assignee indexes
+
+Revision ID: 5c8e1f7a3b60
+Revises: 2d9f6b3e8a47
+Create Date: 2026-10-17 16:48:12.504317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8e1f7a3b60'
+down_revision: Union[str, Sequence[str], None] = '2d9f6b3e8a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORDER = [sa.text('created_at DESC'), sa.text('id DESC')]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # a listagem filtra por status/assignee_id e ordena por (created_at DESC, id DESC): com os
+    # filtros na frente do índice o Postgres lê só as linhas da página, já ordenadas
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_status_created_at_id', 'tickets', ['status', *ORDER],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_tickets_assignee_id_created_at_id', 'tickets', ['assignee_id', *ORDER],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_tickets_triage_queue', 'tickets', ORDER,
+            postgresql_where=sa.text("status = 'open' AND assignee_id IS NULL"),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # prefixos dos compostos acima: só custavam escrita (o FK de assignee_id usa o composto)
+        op.drop_index('ix_tickets_status', table_name='tickets', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(
+            'ix_tickets_assignee_id', table_name='tickets', postgresql_concurrently=True, if_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_assignee_id', 'tickets', ['assignee_id'], postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_tickets_status', 'tickets', ['status'], postgresql_concurrently=True, if_not_exists=True
+        )
+        op.drop_index('ix_tickets_triage_queue', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_assignee_id_created_at_id', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('ix_tickets_status_created_at_id', table_name='tickets', postgresql_concurrently=True)
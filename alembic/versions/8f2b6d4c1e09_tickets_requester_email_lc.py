@@ -0,0 +1,50 @@
+"""tickets.requester_email_lc (generated) + index for requester filter/lookup
+
+Revision ID: 8f2b6d4c1e09
+Revises: 5c8e1f7a3b60
+Create Date: 2026-10-17 17:21:37.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2b6d4c1e09'
+down_revision: Union[str, Sequence[str], None] = '5c8e1f7a3b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # coluna STORED: reescreve a tabela (lock exclusivo durante a migração; rodar em janela)
+    op.add_column('tickets', sa.Column(
+        'requester_email_lc', sa.String(length=255),
+        sa.Computed('lower(requester_email)', persisted=True), nullable=False,
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_requester_email_lc_created_at_id', 'tickets',
+            ['requester_email_lc', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # nenhuma query compara o e-mail com maiúsculas/minúsculas exatas
+        op.drop_index(
+            'ix_tickets_requester_email', table_name='tickets', postgresql_concurrently=True, if_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_requester_email', 'tickets', ['requester_email'],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_tickets_requester_email_lc_created_at_id', table_name='tickets', postgresql_concurrently=True
+        )
+    op.drop_column('tickets', 'requester_email_lc')
@@ -0,0 +1,106 @@
+"""add tickets.search_vector (full-text over title, description and messages)
+
+Revision ID: b52d0e6f7a31
+Revises: 4e1b7c9d2a10
+Create Date: 2026-10-17 10:03:41.208517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b52d0e6f7a31'
+down_revision: Union[str, Sequence[str], None] = '4e1b7c9d2a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 5000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tickets', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # documento completo de um ticket: título (A), descrição (B), mensagens (C)
+    op.execute("""
+        CREATE FUNCTION tickets_search_document(p_id uuid, p_title text, p_description text)
+        RETURNS tsvector LANGUAGE sql STABLE AS $$
+            SELECT setweight(to_tsvector('simple', coalesce(p_title, '')), 'A')
+                || setweight(to_tsvector('simple', coalesce(p_description, '')), 'B')
+                || coalesce(
+                    (SELECT setweight(to_tsvector('simple', string_agg(m.body, ' ')), 'C')
+                     FROM ticket_messages m WHERE m.ticket_id = p_id),
+                    ''::tsvector)
+        $$
+    """)
+
+    op.execute("""
+        CREATE FUNCTION tickets_search_vector_trg() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.search_vector := tickets_search_document(NEW.id, NEW.title, NEW.description);
+            RETURN NEW;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER tickets_search_vector_update
+        BEFORE INSERT OR UPDATE OF title, description ON tickets
+        FOR EACH ROW EXECUTE FUNCTION tickets_search_vector_trg()
+    """)
+
+    # mensagens: INSERT só concatena (barato); UPDATE/DELETE recalcula o documento
+    op.execute("""
+        CREATE FUNCTION ticket_messages_search_vector_trg() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE tickets
+                SET search_vector = coalesce(search_vector, ''::tsvector)
+                    || setweight(to_tsvector('simple', NEW.body), 'C')
+                WHERE id = NEW.ticket_id;
+                RETURN NEW;
+            END IF;
+            UPDATE tickets
+            SET search_vector = tickets_search_document(id, title, description)
+            WHERE id = OLD.ticket_id;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER ticket_messages_search_vector_update
+        AFTER INSERT OR UPDATE OF body OR DELETE ON ticket_messages
+        FOR EACH ROW EXECUTE FUNCTION ticket_messages_search_vector_trg()
+    """)
+
+    # backfill em lotes, cada lote na sua própria transação (não segura lock na tabela toda)
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while True:
+            res = bind.execute(sa.text("""
+                UPDATE tickets
+                SET search_vector = tickets_search_document(id, title, description)
+                WHERE id IN (
+                    SELECT id FROM tickets WHERE search_vector IS NULL LIMIT :batch
+                )
+            """), {"batch": BACKFILL_BATCH})
+            if res.rowcount == 0:
+                break
+        bind.execute(sa.text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_search_vector "
+            "ON tickets USING gin (search_vector)"
+        ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tickets_search_vector', table_name='tickets')
+    op.execute("DROP TRIGGER IF EXISTS ticket_messages_search_vector_update ON ticket_messages")
+    op.execute("DROP FUNCTION IF EXISTS ticket_messages_search_vector_trg()")
+    op.execute("DROP TRIGGER IF EXISTS tickets_search_vector_update ON tickets")
+    op.execute("DROP FUNCTION IF EXISTS tickets_search_vector_trg()")
+    op.execute("DROP FUNCTION IF EXISTS tickets_search_document(uuid, text, text)")
+    op.drop_column('tickets', 'search_vector')
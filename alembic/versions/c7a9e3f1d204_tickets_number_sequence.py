@@ -0,0 +1,51 @@
+"""tickets.number from a sequence + unique constraint
+
+Revision ID: c7a9e3f1d204
+Revises: b52d0e6f7a31
+Create Date: 2026-10-17 10:47:19.630142
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a9e3f1d204'
+down_revision: Union[str, Sequence[str], None] = 'b52d0e6f7a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE SEQUENCE tickets_number_seq START WITH 1000 OWNED BY tickets.number")
+    # continua a numeração atual (o antigo max()+1 começava em 1000)
+    op.execute(
+        "SELECT setval('tickets_number_seq', GREATEST(COALESCE(MAX(number), 999), 999) + 1, false) FROM tickets"
+    )
+
+    # o max()+1 antigo podia repetir números sob concorrência: renumera as duplicatas
+    # (mantém o número no ticket mais antigo) antes de criar a unicidade
+    op.execute("""
+        UPDATE tickets t
+        SET number = nextval('tickets_number_seq')
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY number ORDER BY created_at, id) AS rn
+            FROM tickets
+        ) d
+        WHERE t.id = d.id AND d.rn > 1
+    """)
+
+    op.alter_column('tickets', 'number', server_default=sa.text("nextval('tickets_number_seq')"))
+    op.drop_index(op.f('ix_tickets_number'), table_name='tickets')
+    op.create_index(op.f('ix_tickets_number'), 'tickets', ['number'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tickets_number'), table_name='tickets')
+    op.create_index(op.f('ix_tickets_number'), 'tickets', ['number'], unique=False)
+    op.alter_column('tickets', 'number', server_default=None)
+    op.execute("DROP SEQUENCE tickets_number_seq")
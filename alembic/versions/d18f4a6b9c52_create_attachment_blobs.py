@@ -0,0 +1,43 @@
+"""create attachment_blobs (content-addressed storage) + attachments.digest
+
+Revision ID: d18f4a6b9c52
+Revises: c7a9e3f1d204
+Create Date: 2026-10-17 11:38:02.774915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd18f4a6b9c52'
+down_revision: Union[str, Sequence[str], None] = 'c7a9e3f1d204'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attachment_blobs',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('path', sa.String(length=1024), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    op.add_column('attachments', sa.Column('digest', sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        'attachments_digest_fkey', 'attachments', 'attachment_blobs', ['digest'], ['digest']
+    )
+    op.create_index(op.f('ix_attachments_digest'), 'attachments', ['digest'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_attachments_digest'), table_name='attachments')
+    op.drop_constraint('attachments_digest_fkey', 'attachments', type_='foreignkey')
+    op.drop_column('attachments', 'digest')
+    op.drop_table('attachment_blobs')
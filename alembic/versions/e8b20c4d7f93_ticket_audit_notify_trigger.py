@@ -0,0 +1,65 @@
+"""NOTIFY ticket_events on ticket_audit insert + attachment_added event
+
+Revision ID: e8b20c4d7f93
+Revises: d18f4a6b9c52
+Create Date: 2026-10-17 13:26:55.018344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b20c4d7f93'
+down_revision: Union[str, Sequence[str], None] = 'd18f4a6b9c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TYPE auditevent ADD VALUE IF NOT EXISTS 'attachment_added'")
+
+    # toda escrita de auditoria (rotas, bulk, importação) vira um evento do change feed;
+    # status/assignee atuais vão junto para os clientes filtrarem sem consultar o banco
+    op.execute("""
+        CREATE FUNCTION ticket_audit_notify() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            t RECORD;
+            body jsonb;
+        BEGIN
+            SELECT number, status, assignee_id INTO t FROM tickets WHERE id = NEW.ticket_id;
+            body := jsonb_build_object(
+                'id', NEW.id,
+                'ticket_id', NEW.ticket_id,
+                'number', t.number,
+                'event_type', NEW.event_type,
+                'actor_id', NEW.actor_id,
+                'status', t.status,
+                'assignee_id', t.assignee_id,
+                'created_at', NEW.created_at,
+                'payload', NEW.payload
+            );
+            -- NOTIFY aceita até 8000 bytes: sem o payload o cliente busca o detalhe se precisar
+            IF octet_length(body::text) > 7900 THEN
+                body := body - 'payload';
+            END IF;
+            PERFORM pg_notify('ticket_events', body::text);
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER ticket_audit_notify
+        AFTER INSERT ON ticket_audit
+        FOR EACH ROW EXECUTE FUNCTION ticket_audit_notify()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS ticket_audit_notify ON ticket_audit")
+    op.execute("DROP FUNCTION IF EXISTS ticket_audit_notify()")
+    # valores de enum não podem ser removidos no Postgres; attachment_added fica no tipo
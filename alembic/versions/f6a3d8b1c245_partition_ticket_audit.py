@@ -0,0 +1,101 @@
+"""partition ticket_audit by month on created_at + (ticket_id, created_at) index
+
+Revision ID: f6a3d8b1c245
+Revises: e8b20c4d7f93
+Create Date: 2026-10-17 14:02:37.481920
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a3d8b1c245'
+down_revision: Union[str, Sequence[str], None] = 'e8b20c4d7f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+COLUMNS = "id, ticket_id, actor_id, event_type, payload, created_at"
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def _create_notify_trigger() -> None:
+    op.execute("""
+        CREATE TRIGGER ticket_audit_notify
+        AFTER INSERT ON ticket_audit
+        FOR EACH ROW EXECUTE FUNCTION ticket_audit_notify()
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DROP TRIGGER ticket_audit_notify ON ticket_audit")
+    op.execute("ALTER TABLE ticket_audit RENAME TO ticket_audit_old")
+    op.execute("ALTER INDEX ticket_audit_pkey RENAME TO ticket_audit_old_pkey")
+
+    # toda chave única de tabela particionada inclui a chave de partição: PK (id, created_at)
+    op.execute("""
+        CREATE TABLE ticket_audit (
+            id uuid NOT NULL,
+            ticket_id uuid NOT NULL REFERENCES tickets (id) ON DELETE CASCADE,
+            actor_id uuid REFERENCES users (id) ON DELETE SET NULL,
+            event_type auditevent NOT NULL,
+            payload jsonb NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT ticket_audit_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.create_index('ix_ticket_audit_ticket_id_created_at', 'ticket_audit', ['ticket_id', 'created_at'])
+
+    # uma partição por mês (UTC), do evento mais antigo até MONTHS_AHEAD meses à frente;
+    # as seguintes são criadas por scripts/audit_retention.py
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text(
+        "SELECT min(created_at) AT TIME ZONE 'UTC' FROM ticket_audit_old"
+    )).scalar()
+    today = datetime.now(timezone.utc).date()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        nxt = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE ticket_audit_y{month.year:04d}m{month.month:02d} PARTITION OF ticket_audit "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{nxt.isoformat()} 00:00:00+00')"
+        )
+        month = nxt
+    # rede de segurança: se o job atrasar, o insert não falha (cai aqui e o job avisa)
+    op.execute("CREATE TABLE ticket_audit_default PARTITION OF ticket_audit DEFAULT")
+
+    op.execute(f"INSERT INTO ticket_audit ({COLUMNS}) SELECT {COLUMNS} FROM ticket_audit_old")
+    op.execute("DROP TABLE ticket_audit_old")
+    _create_notify_trigger()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER ticket_audit_notify ON ticket_audit")
+    op.execute("ALTER TABLE ticket_audit RENAME TO ticket_audit_partitioned")
+    op.execute("ALTER INDEX ticket_audit_pkey RENAME TO ticket_audit_partitioned_pkey")
+    op.execute("""
+        CREATE TABLE ticket_audit (
+            id uuid NOT NULL,
+            ticket_id uuid NOT NULL REFERENCES tickets (id) ON DELETE CASCADE,
+            actor_id uuid REFERENCES users (id) ON DELETE SET NULL,
+            event_type auditevent NOT NULL,
+            payload jsonb NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT ticket_audit_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"INSERT INTO ticket_audit ({COLUMNS}) SELECT {COLUMNS} FROM ticket_audit_partitioned")
+    # DROP do pai remove todas as partições anexadas
+    op.execute("DROP TABLE ticket_audit_partitioned")
+    _create_notify_trigger()
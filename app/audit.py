@@ -0,0 +1,233 @@
+import asyncio
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models import AuditEvent, TicketAudit
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# eventos da transação corrente (modo queue); só vão para a fila depois do commit
+_PENDING_KEY = "pending_audit"
+_STOP = object()
+
+
+def record_audit(db: Session, *, ticket_id: UUID, event: AuditEvent, actor_id: Optional[UUID], payload: dict) -> None:
+    """Registra um evento de auditoria da transação de `db`.
+
+    AUDIT_MODE=sync: INSERT na própria transação (como sempre foi).
+    AUDIT_MODE=queue: o evento só sai do processo depois do commit, gravado em lote pelo `audit_writer`.
+    """
+    record_audits(db, [dict(ticket_id=ticket_id, event_type=event, actor_id=actor_id, payload=payload or {})])
+
+
+def record_audits(db: Session, rows: list[dict]) -> None:
+    """Vários eventos de uma vez (dicts com ticket_id, event_type, actor_id, payload)."""
+    if not rows:
+        return
+    if settings.audit_mode != "queue":
+        # um único INSERT multi-row; não faz commit, cada rota decide quando commitar
+        db.execute(insert(TicketAudit), rows)
+        return
+    # id e horário fixados agora: a ordem dos eventos não depende de quando o lote é gravado
+    now = datetime.now(timezone.utc)
+    db.info.setdefault(_PENDING_KEY, []).extend(
+        {**row, "id": uuid.uuid4(), "created_at": now} for row in rows
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_after_commit(session: Session) -> None:
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        audit_writer.submit(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class AuditWriter:
+    """Fila em memória + thread que grava os eventos em INSERTs multi-row.
+
+    Backpressure: com a fila cheia, `submit` espera até `enqueue_timeout`; se ainda assim não
+    couber, grava o restante direto (a requisição paga o I/O, mas nada se perde). No event loop
+    (commit dentro do `run_sync` com DB_ASYNC) `submit` nunca bloqueia: essa espera e a gravação
+    direta vão para uma thread de overflow.
+    `stop()` (lifespan/atexit) esvazia a fila antes de sair.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, queue_size: int, enqueue_timeout: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._overflow: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.overflow_writes = 0
+        self.failed = 0
+
+    def submit(self, rows: list[dict]) -> None:
+        self._ensure_started()
+        for i, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                overflow = self._overflow
+                if overflow is not None and _on_event_loop():
+                    # esperar pela fila ou gravar aqui travaria todas as requisições do processo
+                    overflow.submit(self._enqueue_blocking, rows[i:])
+                else:
+                    self._enqueue_blocking(rows[i:])
+                return
+
+    def _enqueue_blocking(self, rows: list[dict]) -> None:
+        for i, row in enumerate(rows):
+            try:
+                self._queue.put(row, timeout=self.enqueue_timeout)
+            except queue.Full:
+                logger.warning("audit queue full; writing %d events directly", len(rows) - i)
+                self.overflow_writes += 1
+                self._write_with_retry(rows[i:], final=True)
+                return
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                # uma thread só: o overflow é serializado e não multiplica conexões no pool
+                self._overflow = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-overflow")
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Grava tudo o que está na fila e encerra a thread (idempotente)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            overflow, self._overflow = self._overflow, None
+        if thread is None:
+            return
+        if overflow is not None:
+            overflow.shutdown(wait=True)  # o overflow pendente ainda entra na fila ou é gravado
+        self._queue.put(_STOP)  # bloqueia se cheia: a thread está consumindo
+        thread.join()
+
+    def status(self) -> dict:
+        return {
+            "mode": settings.audit_mode,
+            "pending": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "overflow_writes": self.overflow_writes,
+            "failed": self.failed,
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write_with_retry(batch, final=stopping)
+        # o que ainda estiver na fila depois do sinal de parada
+        rest = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        for i in range(0, len(rest), self.batch_size):
+            self._write_with_retry(rest[i:i + self.batch_size], final=True)
+
+    def _write_with_retry(self, batch: list[dict], final: bool) -> None:
+        backoff = 0.5
+        attempts = 0
+        while True:
+            try:
+                self._write(batch)
+                return
+            except Exception:
+                attempts += 1
+                if final and attempts >= 3:
+                    # último recurso no shutdown: os eventos vão para o log em vez de sumirem
+                    self.failed += len(batch)
+                    logger.exception("dropping %d audit events after %d attempts", len(batch), attempts)
+                    for row in batch:
+                        logger.error("audit event not written: %s", json.dumps(row, default=str))
+                    return
+                logger.exception("audit batch failed; retrying in %.1fs", backoff)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+
+    def _write(self, batch: list[dict]) -> None:
+        skipped = 0
+        with SessionLocal() as db:
+            try:
+                db.execute(insert(TicketAudit), batch)
+                db.commit()
+            except IntegrityError:
+                # ticket apagado entre o commit e o flush (FK): grava o resto linha a linha
+                db.rollback()
+                for row in batch:
+                    try:
+                        db.execute(insert(TicketAudit), [row])
+                        db.commit()
+                    except IntegrityError:
+                        db.rollback()
+                        skipped += 1
+                        logger.warning("skipping audit event for missing ticket %s", row["ticket_id"])
+        self.written += len(batch) - skipped
+        self.failed += skipped
+        self.batches += 1
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_seconds,
+    queue_size=settings.audit_queue_size,
+    enqueue_timeout=settings.audit_enqueue_timeout_seconds,
+)
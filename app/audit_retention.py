@@ -0,0 +1,163 @@
+import gzip
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+# partições mensais: ticket_audit_y2026m10 cobre [2026-10-01, 2026-11-01) UTC.
+# ticket_audit_default só recebe linhas se faltar partição (ensure_partitions não rodou); a
+# próxima execução move essas linhas para a partição criada.
+PARENT = "ticket_audit"
+DEFAULT_PARTITION = "ticket_audit_default"
+_NAME_RE = re.compile(r"^ticket_audit_y(\d{4})m(\d{2})$")
+
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def _parse_name(name: str) -> Optional[date]:
+    m = _NAME_RE.match(name)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+def list_partitions(conn: Connection) -> dict[date, str]:
+    """Partições mensais anexadas hoje a ticket_audit, por mês."""
+    rows = conn.execute(text("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+    """), {"parent": PARENT}).scalars()
+    return {month: name for name in rows if (month := _parse_name(name))}
+
+
+_COLUMNS = "id, ticket_id, actor_id, event_type, payload, created_at"
+
+
+def _create_partition(conn: Connection, month: date) -> str:
+    """Cria a partição de `month`; se a default já tem linhas desse mês, move-as para ela."""
+    name = partition_name(month)
+    start, end = f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+    bounds = f"FROM ('{start}') TO ('{end}')"
+    stray = conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= CAST(:start AS timestamptz) AND created_at < CAST(:end AS timestamptz))"
+    ), {"start": start, "end": end}).scalar_one()
+    if not stray:
+        # caso normal: a default está vazia e a validação do CREATE não tem o que varrer
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES {bounds}"))
+        return name
+
+    # com linhas do mês na default, o CREATE ... PARTITION OF falharia: desanexa a default, monta a
+    # partição como tabela avulsa (sem o trigger de NOTIFY: as linhas movidas não viram eventos
+    # de novo), move as linhas e anexa as duas de volta
+    logger.warning("moving rows of %s out of %s", name, DEFAULT_PARTITION)
+    conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {DEFAULT_PARTITION}"))
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= CAST(:start AS timestamptz) AND created_at < CAST(:end AS timestamptz) "
+        f"RETURNING {_COLUMNS}) INSERT INTO {name} ({_COLUMNS}) SELECT {_COLUMNS} FROM moved"
+    ), {"start": start, "end": end})
+    conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return name
+
+
+def ensure_partitions_between(conn: Connection, first: date, last: date) -> list[str]:
+    """Cria as partições mensais que faltam de `first` até `last` (inclusive; idempotente).
+
+    Rode numa transação (`engine.begin()`): se a default precisar ser desanexada, ticket_audit
+    nunca fica sem ela para quem está fora da transação.
+    """
+    existing = list_partitions(conn)
+    created = []
+    month = month_start(first)
+    while month <= last:
+        if month not in existing:
+            created.append(_create_partition(conn, month))
+        month = add_months(month, 1)
+    return created
+
+
+def ensure_partitions(conn: Connection, months_ahead: int, today: Optional[date] = None) -> list[str]:
+    """Cria as partições do mês atual até `months_ahead` meses à frente (idempotente)."""
+    current = month_start(today or datetime.now(timezone.utc).date())
+    return ensure_partitions_between(conn, current, add_months(current, months_ahead))
+
+
+@dataclass
+class ArchivedPartition:
+    name: str
+    rows: int
+    path: Path
+
+
+def _export(conn: Connection, table: str, dest: Path) -> int:
+    """COPY da partição para CSV gzip (escrita em temporário + rename). Retorna o nº de linhas."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix(dest.suffix + ".tmp")
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        with gzip.open(tmp, "wb") as out:
+            cursor.copy_expert(f"COPY {table} TO STDOUT WITH (FORMAT csv, HEADER true)", out)
+        rows = cursor.rowcount
+    finally:
+        cursor.close()
+    tmp.replace(dest)
+    return rows
+
+
+def archive_partitions(
+    conn: Connection,
+    retention_months: int,
+    out_dir: Path,
+    *,
+    drop: bool = True,
+    dry_run: bool = False,
+    today: Optional[date] = None,
+) -> list[ArchivedPartition]:
+    """Exporta as partições inteiramente anteriores à janela de retenção para
+    `<out_dir>/<partição>.csv.gz`, desanexa e remove cada uma (ou mantém a tabela com drop=False).
+
+    `conn` deve estar em autocommit: cada partição é exportada, desanexada e removida por vez.
+    """
+    cutoff = add_months(month_start(today or datetime.now(timezone.utc).date()), -retention_months)
+    archived = []
+    for month, name in sorted(list_partitions(conn).items()):
+        if month >= cutoff:
+            break
+        dest = out_dir / f"{name}.csv.gz"
+        if dry_run:
+            archived.append(ArchivedPartition(name=name, rows=0, path=dest))
+            continue
+        # exporta antes de desanexar: se o export falhar, a partição continua no lugar e a
+        # próxima execução tenta de novo (o mês já está fechado, não recebe mais inserts)
+        rows = _export(conn, name, dest)
+        conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        if drop:
+            conn.execute(text(f"DROP TABLE {name}"))
+        logger.info("archived %s (%d rows) to %s", name, rows, dest)
+        archived.append(ArchivedPartition(name=name, rows=rows, path=dest))
+    return archived
+
+
+def default_partition_rows(conn: Connection) -> int:
+    """Linhas caídas na partição default: >0 indica que faltou partição para algum mês."""
+    return conn.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar_one()
@@ -0,0 +1,66 @@
+from typing import Hashable, Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.schemas import TicketStatus
+from app.settings import settings
+
+# contagens exatas por filtro normalizado (q, status, assignee_id, unassigned, requester_email);
+# invalidadas por status nas escritas de tickets deste processo. Outros processos (workers,
+# scripts) só convergem quando a entrada expira (COUNT_CACHE_TTL_SECONDS).
+count_cache = TTLCache(maxsize=settings.count_cache_size, ttl=settings.count_cache_ttl_seconds)
+
+
+def invalidate_counts(statuses: Iterable[Optional[TicketStatus]], *, search_only: bool = False) -> None:
+    """Descarta as contagens que uma escrita pode ter mudado.
+
+    Saem as chaves sem filtro de status ou filtradas por um de `statuses` (passe os status de antes
+    e de depois da escrita). `search_only=True` (mensagens: só muda o texto indexado) restringe às
+    contagens de busca (`q=`).
+    """
+    affected = {TicketStatus(s).value for s in statuses if s is not None}
+
+    def stale(key) -> bool:
+        q, status = key[0], key[1]
+        return (status is None or status in affected) and (q is not None or not search_only)
+
+    count_cache.discard_where(stale)
+
+
+def cached_count(key: Hashable) -> Optional[int]:
+    return count_cache.get(key)
+
+
+def store_count(key: Hashable, total: int) -> None:
+    count_cache.set(key, total)
+
+
+def estimate_ticket_count(db: Session, status: Optional[TicketStatus] = None) -> Optional[int]:
+    """Estimativa via estatísticas do planner (pg_class/pg_stats), sem varrer a tabela.
+
+    Retorna None quando não há estatísticas (tabela nunca analisada) ou o status não está
+    entre os valores mais comuns; nesse caso quem chama cai para a contagem exata.
+    """
+    reltuples = db.execute(
+        text("SELECT reltuples FROM pg_class WHERE oid = 'tickets'::regclass")
+    ).scalar()
+    if reltuples is None or reltuples < 0:
+        return None
+    if status is None:
+        return int(reltuples)
+
+    row = db.execute(
+        text(
+            "SELECT most_common_vals::text::text[] AS vals, most_common_freqs AS freqs "
+            "FROM pg_stats WHERE schemaname = current_schema() "
+            "AND tablename = 'tickets' AND attname = 'status'"
+        )
+    ).first()
+    if row is None or row.vals is None:
+        return None
+    for val, freq in zip(row.vals, row.freqs):
+        if val == status.value:
+            return int(round(reltuples * freq))
+    return None
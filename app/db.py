@@ -1,15 +1,274 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional, TypeVar, Union
 
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+
+from app.metrics import SLOW_QUERIES
 from app.settings import settings
 
-engine = create_engine(settings.database_url, future=True, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+class PoolStats:
+    """Contadores do pool: checkouts, espera por conexão, timeouts e tempo de sessão por request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.sessions = 0
+        self.session_seconds_total = 0.0
+        self.session_seconds_max = 0.0
+
+    def record_checkout(self, waited: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_session(self, held: float) -> None:
+        with self._lock:
+            self.sessions += 1
+            self.session_seconds_total += held
+            self.session_seconds_max = max(self.session_seconds_max, held)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "sessions": self.sessions,
+                "session_seconds_avg": round(self.session_seconds_total / self.sessions, 6) if self.sessions else 0.0,
+                "session_seconds_max": round(self.session_seconds_max, 6),
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Mede quanto cada checkout esperou por uma conexão livre (fila do pool)."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    stats = PoolStats()
+
+
+class InstrumentedAsyncPool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+
+
+_pool_kwargs = dict(
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+)
+
+engine = create_engine(settings.database_url, future=True, poolclass=InstrumentedQueuePool, **_pool_kwargs)
+# expire_on_commit=False: as rotas montam a resposta com o que já têm (RETURNING), sem SELECT pós-commit
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+# modo async (settings.db_async): asyncpg + AsyncSession, sem ocupar o threadpool por request
+async_engine = None
+AsyncSessionLocal = None
+if settings.db_async:
+    async_url = settings.async_database_url or make_url(settings.database_url).set(
+        drivername="postgresql+asyncpg"
+    ).render_as_string(hide_password=False)
+    async_engine = create_async_engine(async_url, poolclass=InstrumentedAsyncPool, **_pool_kwargs)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+DbSession = Union[Session, AsyncSession]
+T = TypeVar("T")
+
 
 # Dependency p/ FastAPI (usaremos nos endpoints)
-def get_db():
+def get_sync_db():
     db = SessionLocal()
+    start = time.perf_counter()
     try:
         yield db
     finally:
         db.close()
+        InstrumentedQueuePool.stats.record_session(time.perf_counter() - start)
+
+
+async def get_async_db():
+    start = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            yield db
+    finally:
+        InstrumentedAsyncPool.stats.record_session(time.perf_counter() - start)
+
+
+get_db = get_async_db if settings.db_async else get_sync_db
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Executa `fn(session, *args)` (código ORM síncrono) sem bloquear o event loop.
+
+    Com AsyncSession usa `run_sync` (greenlet sobre o asyncpg); com Session roda no threadpool,
+    como o FastAPI faria com uma rota `def`. `fn` deve devolver schemas, não objetos ORM.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+def pool_status() -> dict:
+    """Estado atual do(s) pool(s) + contadores acumulados (servido em /health/pool)."""
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    out = {}
+    for name, eng in engines.items():
+        pool = eng.pool
+        out[name] = {
+            "size": pool.size(),
+            "max_overflow": settings.db_max_overflow,
+            "checked_out": pool.checkedout(),  # conexões em uso agora
+            "checked_in": pool.checkedin(),  # ociosas no pool
+            "overflow": max(pool.overflow(), 0),  # conexões abertas acima de pool_size
+            "pre_ping": settings.db_pool_pre_ping,
+            **pool.stats.snapshot(),
+        }
+    return out
+
+
+# ---------- Contagem de queries / instrumentação ----------
+slow_query_logger = logging.getLogger("app.db.slow")
+
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\$\d+")  # psycopg2 (pyformat/format) e asyncpg ($1)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\?(?:\s*,\s*\?)+\)")
+
+
+def fingerprint(statement: str) -> tuple[str, str]:
+    """(hash curto, SQL normalizado): parâmetros/literais viram `?` e listas `(?, ?, ...)` viram `(...)`,
+    então a mesma query com valores diferentes (ou IN de tamanhos diferentes) cai no mesmo fingerprint."""
+    norm = " ".join(statement.split())
+    norm = _PARAM_RE.sub("?", norm)
+    norm = _LITERAL_RE.sub("?", norm)
+    norm = _LIST_RE.sub("(...)", norm)
+    return hashlib.sha1(norm.encode()).hexdigest()[:12], norm
+
+
+def _value_shape(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def bind_shape(parameters: Any, executemany: bool) -> str:
+    """Forma dos parâmetros (nomes, tipos, tamanhos de listas), nunca os valores (podem ter PII)."""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)}x {bind_shape(rows[0], False)}" if rows else "0x"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {_value_shape(v)}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(_value_shape(v) for v in parameters) + ")"
+    return _value_shape(parameters)
+
+
+class QueryCounter:
+    def __init__(self, label: str = "", keep_statements: bool = False):
+        self.label = label  # ex.: "GET /tickets" (aparece no log de queries lentas)
+        self.count = 0
+        self.db_time = 0.0  # segundos somados de todas as queries
+        # SQL de cada query: só quando alguém vai ler (query_budget); por requisição seria só memória
+        self.statements: Optional[list[str]] = [] if keep_statements else None
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.record(statement)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _time_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.db_time += elapsed
+    if settings.slow_query_ms > 0 and elapsed * 1000 >= settings.slow_query_ms:
+        fp, norm = fingerprint(statement)
+        SLOW_QUERIES.inc(fingerprint=fp)
+        slow_query_logger.warning(
+            "slow query %.1fms fp=%s request=%r binds=%s sql=%s",
+            elapsed * 1000, fp, counter.label if counter else None,
+            bind_shape(parameters, executemany), norm[:1000],
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_query_start(context):
+    # query que falhou não passa por after_cursor_execute: tira o início da pilha
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+@contextmanager
+def count_queries(label: str = "", keep_statements: bool = False) -> Iterator[QueryCounter]:
+    """Conta as queries (e o tempo de banco) no contexto atual (inclui threadpool e greenlet do run_db)."""
+    counter = QueryCounter(label, keep_statements)
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryCounter]:
+    """Falha (AssertionError) se o bloco executar mais de `max_queries` queries; para testes."""
+    with count_queries(keep_statements=True) as counter:
+        yield counter
+    if counter.count > max_queries:
+        listing = "\n".join(f"  {i}. {sql}" for i, sql in enumerate(counter.statements, 1))
+        raise AssertionError(f"{counter.count} queries (budget {max_queries}):\n{listing}")
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# canal do NOTIFY disparado pelo trigger em ticket_audit (ver migration e8b20c4d7f93)
+CHANNEL = "ticket_events"
+
+
+def _previous(event: dict, event_type: str) -> Optional[str]:
+    """Valor antigo (payload "from") quando o evento é `event_type`; senão None."""
+    if event.get("event_type") != event_type:
+        return None
+    value = (event.get("payload") or {}).get("from")
+    # a auditoria grava o status como str(TicketStatus.x) ("TicketStatus.open"); UUIDs não têm ponto
+    return value.rsplit(".", 1)[-1] if value else None
+
+
+class Subscription:
+    """Fila de eventos de um cliente conectado, com filtro opcional por status/assignee."""
+
+    def __init__(self, feed: "ChangeFeed", status: Optional[str], assignee_id: Optional[UUID]):
+        self._feed = feed
+        self.status = status
+        self.assignee_id = str(assignee_id) if assignee_id else None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.feed_queue_size)
+
+    def matches(self, event: dict) -> bool:
+        # o NOTIFY traz o status/assignee atuais; a mudança também vai para quem filtrava pelo valor
+        # antigo (quem assiste status=open precisa saber que o ticket saiu de open)
+        if self.status and self.status not in (event.get("status"), _previous(event, "status_changed")):
+            return False
+        if self.assignee_id and self.assignee_id not in (
+            event.get("assignee_id"), _previous(event, "assignee_changed")
+        ):
+            return False
+        return True
+
+    async def get(self) -> Optional[dict]:
+        """Próximo evento; None quando o feed derrubou a assinatura (cliente lento demais)."""
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self._feed._unsubscribe(self)
+
+
+class ChangeFeed:
+    """Um LISTEN por processo, repassado para todos os clientes conectados (fan-out em memória).
+
+    A conexão de LISTEN (psycopg2, fora do pool) roda numa thread própria e só é aberta quando o
+    primeiro cliente se conecta; cai e reconecta sozinha em caso de erro.
+    """
+
+    def __init__(self):
+        self._subscribers: set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def subscribe(self, status: Optional[str] = None, assignee_id: Optional[UUID] = None) -> Subscription:
+        sub = Subscription(self, status, assignee_id)
+        self._subscribers.add(sub)
+        self._ensure_started()
+        return sub
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="ticket-change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self) -> None:
+        engine = create_engine(settings.database_url, poolclass=NullPool)
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                raw = engine.raw_connection()
+                try:
+                    conn = raw.driver_connection
+                    conn.autocommit = True
+                    with conn.cursor() as cur:
+                        cur.execute(f"LISTEN {CHANNEL}")
+                    backoff = 1.0
+                    while not self._stop.is_set():
+                        if select.select([conn], [], [], 1.0) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            note = conn.notifies.pop(0)
+                            self._loop.call_soon_threadsafe(self._dispatch, note.payload)
+                finally:
+                    raw.close()
+            except Exception:
+                logger.exception("change feed listener failed; reconnecting in %.0fs", backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+        engine.dispose()
+
+    def _dispatch(self, payload: str) -> None:
+        """Roda no event loop: entrega o evento a quem tem filtro compatível."""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("ignoring malformed notification: %r", payload[:200])
+            return
+        for sub in list(self._subscribers):
+            if not sub.matches(event):
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # cliente não acompanha: derruba (ele reconecta) em vez de acumular memória
+                self._subscribers.discard(sub)
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.queue.put_nowait(None)
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,18 @@
+import hashlib
+from typing import Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara o header If-None-Match com o ETag atual (comparação fraca, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def make_etag(*parts: object) -> str:
+    """ETag fraco a partir das partes que identificam a representação (versão, filtros...)."""
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
@@ -0,0 +1,147 @@
+import codecs
+import csv
+import json
+import uuid
+from typing import Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models import AuditEvent, Ticket, TicketAudit, TicketStatus, allocate_ticket_numbers
+from app.schemas import TicketCreate, TicketImportError, TicketImportResult
+
+MAX_REPORTED_ERRORS = 100
+
+
+class RecordReader:
+    """Quebra um stream de bytes (NDJSON ou CSV com cabeçalho) em registros, incrementalmente.
+
+    Guarda só o registro incompleto do fim do chunk, então a memória não cresce com o arquivo.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in ("ndjson", "csv"):
+            raise ValueError(f"unsupported format: {fmt}")
+        self.fmt = fmt
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._pending = ""
+        self._header: Optional[list[str]] = None
+        self.line_no = 0
+
+    def feed(self, chunk: bytes) -> Iterator[tuple[int, dict | Exception]]:
+        self._pending += self._decoder.decode(chunk)
+        yield from self._drain(final=False)
+
+    def close(self) -> Iterator[tuple[int, dict | Exception]]:
+        self._pending += self._decoder.decode(b"", final=True)
+        yield from self._drain(final=True)
+
+    def _drain(self, final: bool) -> Iterator[tuple[int, dict | Exception]]:
+        start = 0
+        record_start = 0
+        while True:
+            nl = self._pending.find("\n", start)
+            if nl < 0:
+                break
+            start = nl + 1
+            record = self._pending[record_start:start]
+            # CSV: quebra de linha dentro de campo entre aspas não encerra o registro
+            if self.fmt == "csv" and record.count('"') % 2:
+                continue
+            record_start = start
+            yield from self._parse(record)
+        self._pending = self._pending[record_start:]
+        if final and self._pending:
+            record, self._pending = self._pending, ""
+            yield from self._parse(record)
+
+    def _parse(self, record: str) -> Iterator[tuple[int, dict | Exception]]:
+        self.line_no += record.count("\n") or 1
+        if not record.strip():
+            return
+        try:
+            if self.fmt == "ndjson":
+                data = json.loads(record)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+            else:
+                row = next(csv.reader([record]))
+                if self._header is None:
+                    self._header = [h.strip() for h in row]
+                    return
+                data = dict(zip(self._header, row))
+        except Exception as exc:
+            yield self.line_no, exc
+            return
+        yield self.line_no, data
+
+
+class TicketImport:
+    """Valida registros com `TicketCreate` e agrupa em lotes de `batch_size` para inserir."""
+
+    def __init__(self, fmt: str, batch_size: int):
+        self.reader = RecordReader(fmt)
+        self.batch_size = batch_size
+        self.result = TicketImportResult(inserted=0, failed=0, errors=[])
+        self._batch: list[TicketCreate] = []
+
+    def feed(self, chunk: bytes) -> Iterator[list[TicketCreate]]:
+        """Consome um chunk; devolve os lotes que ficaram cheios."""
+        yield from self._collect(self.reader.feed(chunk))
+
+    def finish(self) -> Iterator[list[TicketCreate]]:
+        yield from self._collect(self.reader.close())
+        if self._batch:
+            batch, self._batch = self._batch, []
+            yield batch
+
+    def _collect(self, records) -> Iterator[list[TicketCreate]]:
+        for line_no, data in records:
+            try:
+                if isinstance(data, Exception):
+                    raise data
+                self._batch.append(TicketCreate.model_validate(data))
+            except (ValidationError, ValueError) as exc:
+                self._fail(line_no, exc)
+                continue
+            if len(self._batch) >= self.batch_size:
+                batch, self._batch = self._batch, []
+                yield batch
+
+    def _fail(self, line_no: int, exc: Exception) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            if isinstance(exc, ValidationError):
+                msg = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())
+            else:
+                msg = str(exc)
+            self.result.errors.append(TicketImportError(line=line_no, error=msg))
+
+
+def insert_batch(db: Session, batch: list[TicketCreate], source: str = "import") -> int:
+    """Insere um lote: números reservados de uma vez na sequence + INSERT multi-row, 1 commit."""
+    numbers = allocate_ticket_numbers(db, len(batch))
+    tickets = []
+    audits = []
+    for number, item in zip(numbers, batch):
+        ticket_id = uuid.uuid4()
+        tickets.append(dict(
+            id=ticket_id,
+            number=number,
+            title=item.title,
+            description=item.description,
+            requester_name=item.requester_name,
+            requester_email=item.requester_email,
+            status=TicketStatus.open,
+        ))
+        audits.append(dict(
+            ticket_id=ticket_id,
+            event_type=AuditEvent.ticket_created,
+            actor_id=None,
+            payload={"number": number, "title": item.title, "requester_email": item.requester_email, "source": source},
+        ))
+    db.execute(insert(Ticket), tickets)
+    db.execute(insert(TicketAudit), audits)
+    db.commit()
+    return len(tickets)
@@ -0,0 +1,110 @@
+import logging
+import time
+
+from fastapi import Request, Response
+from fastapi.responses import HTMLResponse
+
+from app import metrics
+from app.db import count_queries, pool_status
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+try:  # routers incluídos por referência: a rota do scope não tem o prefixo do include_router
+    from fastapi.routing import iter_route_contexts
+except ImportError:  # pragma: no cover - versões que copiam as rotas já com o path completo
+    iter_route_contexts = None
+
+# id da rota -> template completo (prefixo + path); as rotas não mudam depois do startup
+_templates: dict[int, str] = {}
+
+
+def _full_paths(routes) -> dict[int, str]:
+    if iter_route_contexts is None:
+        pairs = ((route, getattr(route, "path", None)) for route in routes)
+    else:
+        pairs = ((ctx.original_route, ctx.path) for ctx in iter_route_contexts(routes))
+    paths: dict[int, str] = {}
+    for route, path in pairs:
+        if path:
+            paths.setdefault(id(route), path)
+    return paths
+
+
+def _route_template(request: Request) -> str:
+    """Template da rota (ex.: /tickets/{ticket_id}): mantém a cardinalidade das métricas baixa."""
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    if not _templates:
+        _templates.update(_full_paths(request.app.routes))
+    return _templates.get(id(route)) or getattr(route, "path", None) or "unmatched"
+
+
+def _wants_profile(request: Request) -> bool:
+    return settings.profiling_enabled and request.headers.get("x-profile") == "1"
+
+
+async def _profiled(request: Request, call_next) -> Response:
+    """Roda a requisição sob o pyinstrument (amostragem) e devolve o relatório HTML no lugar da resposta."""
+    try:
+        from pyinstrument import Profiler
+    except ImportError:  # pragma: no cover - depende do ambiente
+        logger.warning("X-Profile ignorado: PROFILING_ENABLED requer o pacote pyinstrument")
+        return await call_next(request)
+
+    profiler = Profiler(interval=settings.profiling_interval_ms / 1000, async_mode="enabled")
+    profiler.start()
+    try:
+        response = await call_next(request)
+        # consome o corpo dentro do profiling (rotas em streaming também entram na amostra)
+        async for _ in response.body_iterator:
+            pass
+    finally:
+        profiler.stop()
+    return HTMLResponse(profiler.output_html(), headers={"X-Profiled-Status": str(response.status_code)})
+
+
+async def instrument_request(request: Request, call_next) -> Response:
+    """Por requisição: nº de queries, tempo de banco e latência (Server-Timing, /metrics, X-Query-Count)."""
+    start = time.perf_counter()
+    with count_queries(f"{request.method} {request.url.path}") as counter:
+        if _wants_profile(request):
+            response = await _profiled(request, call_next)
+        else:
+            response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    route = _route_template(request)
+    labels = {"method": request.method, "route": route}
+    metrics.REQUESTS.inc(status=str(response.status_code), **labels)
+    metrics.REQUEST_DURATION.observe(elapsed, **labels)
+    metrics.REQUEST_QUERIES.observe(counter.count, **labels)
+    metrics.REQUEST_DB_TIME.observe(counter.db_time, **labels)
+
+    if settings.server_timing:
+        # tempos até os headers; em respostas streaming o corpo ainda não foi enviado
+        response.headers["Server-Timing"] = (
+            f'db;dur={counter.db_time * 1000:.1f};desc="{counter.count} queries", '
+            f"app;dur={elapsed * 1000:.1f}"
+        )
+    if settings.query_count_header:
+        response.headers["X-Query-Count"] = str(counter.count)
+    return response
+
+
+def metrics_text() -> str:
+    """Métricas acumuladas + estado atual do pool, no formato texto do Prometheus."""
+    gauges = {
+        "checked_out": "Conexões em uso",
+        "checked_in": "Conexões ociosas no pool",
+        "overflow": "Conexões abertas acima de pool_size",
+    }
+    pools = pool_status()
+    extra = []
+    for key, help in gauges.items():
+        extra += metrics.gauge_lines(
+            f"db_pool_{key}", help, {(("pool", name),): stats[key] for name, stats in pools.items()}
+        )
+    return metrics.render(extra)
@@ -1,19 +1,50 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
+from app.audit import audit_writer
+from app.db import pool_status
+from app.instrumentation import instrument_request, metrics_text
+from app.events import change_feed
 from app.settings import settings
 from app.routes import tickets_router
 from app.routes.auth import router as auth_router
 from app.security import get_current_user, TokenData
 
-app = FastAPI(title="Support Desk MVP", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    change_feed.stop()  # encerra o LISTEN do change feed, se estiver rodando
+    audit_writer.stop()  # AUDIT_MODE=queue: grava os eventos pendentes antes de sair
+
+app = FastAPI(title="Support Desk MVP", version="0.1.0", lifespan=lifespan)
+
+# queries/tempo de banco por requisição: Server-Timing, X-Query-Count, /metrics e X-Profile
+app.middleware("http")(instrument_request)
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok", "env": settings.env}
 
+@app.get("/health/pool")
+async def health_pool():
+    """Uso do pool de conexões: ajuda a separar fila no pool de query lenta."""
+    return pool_status()
+
+@app.get("/health/audit")
+async def health_audit():
+    """Fila do writer de auditoria (AUDIT_MODE=queue): pendentes, lotes gravados, falhas."""
+    return audit_writer.status()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Formato texto do Prometheus: latência por rota, queries por requisição, queries lentas, pool."""
+    return PlainTextResponse(metrics_text(), media_type="text/plain; version=0.0.4")
+
 app.include_router(tickets_router, prefix="/tickets", tags=["tickets"])
 
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 
 @app.get("/me")
-def me(user: TokenData = Depends(get_current_user)):
+async def me(user: TokenData = Depends(get_current_user)):
     return {"user_id": user.user_id, "role": user.role}
\ No newline at end of file
@@ -0,0 +1,109 @@
+import threading
+from typing import Iterable
+
+# métricas em memória no formato texto do Prometheus (sem dependência de prometheus_client).
+# São por processo: com vários workers, cada um expõe as suas (raspe cada worker ou use 1 por pod).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+_INF = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_fmt(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        # por conjunto de labels: [contagem por bucket..., soma, total]
+        self._values: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, data in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, data):
+                    le = f'le="{_fmt(bound)}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_fmt(count)}")
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, _INF)} {_fmt(data[-1])}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(data[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_fmt(data[-1])}")
+        return lines
+
+
+REQUESTS = Counter("http_requests_total", "Requisições HTTP por rota e status", ("method", "route", "status"))
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota", ("method", "route")
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "Queries SQL por requisição", ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Tempo de banco somado por requisição", ("method", "route")
+)
+SLOW_QUERIES = Counter("db_slow_queries_total", "Queries acima de SLOW_QUERY_MS, por fingerprint", ("fingerprint",))
+
+REGISTRY = (REQUESTS, REQUEST_DURATION, REQUEST_QUERIES, REQUEST_DB_TIME, SLOW_QUERIES)
+
+
+def gauge_lines(name: str, help: str, samples: dict[tuple[tuple[str, str], ...], float]) -> list[str]:
+    """Gauges calculados na hora da coleta (ex.: estado do pool)."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for labels, value in samples.items():
+        names = [k for k, _ in labels]
+        values = [v for _, v in labels]
+        lines.append(f"{name}{_labels(names, values)} {_fmt(value)}")
+    return lines
+
+
+def render(extra: Iterable[str] = ()) -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    lines += list(extra)
+    return "\n".join(lines) + "\n"
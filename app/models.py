@@ -3,9 +3,12 @@ import enum
 import uuid
 from typing import Optional
 
-from sqlalchemy import String, Text, Enum, DateTime, ForeignKey, Index, select
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import (
+    BigInteger, Column, Computed, SmallInteger, String, Table, Text, Enum, DateTime, ForeignKey, Index, Sequence,
+    UniqueConstraint, select,
+)
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, Session
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.sql import func
 
 
@@ -37,19 +40,33 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
+# números de ticket vêm de uma sequence do Postgres: sem corrida entre inserts concorrentes
+ticket_number_seq = Sequence("tickets_number_seq", start=1000, metadata=Base.metadata)
+
+
 class Ticket(Base):
     __tablename__ = "tickets"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    number: Mapped[int] = mapped_column(index=True, nullable=False)  # gerado na aplicação
+    number: Mapped[int] = mapped_column(
+        server_default=ticket_number_seq.next_value(), index=True, unique=True, nullable=False
+    )
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     requester_name: Mapped[str] = mapped_column(String(120), nullable=False)
-    requester_email: Mapped[str] = mapped_column(String(255), index=True, nullable=False)
+    requester_email: Mapped[str] = mapped_column(String(255), nullable=False)
+    # coluna gerada pelo banco: filtros/lookup por e-mail sem diferenciar maiúsculas
+    requester_email_lc: Mapped[str] = mapped_column(
+        String(255), Computed("lower(requester_email)", persisted=True), nullable=False
+    )
     status: Mapped[TicketStatus] = mapped_column(Enum(TicketStatus), nullable=False, default=TicketStatus.open)
     assignee_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # preenchido por trigger na primeira mensagem do ticket (ver ticket_stats)
+    first_response_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # mantido por trigger no banco (título + descrição + corpo das mensagens); ver app/search.py
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, nullable=True, deferred=True)
     attachments: Mapped[list["Attachment"]] = relationship(
     back_populates="ticket", cascade="all, delete-orphan", order_by="Attachment.created_at.asc()"
 )
@@ -59,11 +76,53 @@ class Ticket(Base):
         back_populates="ticket", cascade="all, delete-orphan", order_by="TicketMessage.created_at.asc()"
     )
 
-    __table_args__ = (
-        Index("ix_tickets_status", "status"),
-        Index("ix_tickets_assignee_id", "assignee_id"),
-        Index("ix_tickets_requester_email", "requester_email"),
-    )
+    # busca defaults do servidor (number, created_at, updated_at) no próprio INSERT/UPDATE ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
+
+
+# ordenação padrão da listagem (keyset pagination em created_at/id); os filtros da listagem
+# (status, assignee_id) vêm na frente para o Postgres ler já na ordem, sem Sort.
+# Verificação dos planos: python -m bench.explain
+Index("ix_tickets_created_at_id", Ticket.created_at.desc(), Ticket.id.desc())
+Index("ix_tickets_status_created_at_id", Ticket.status, Ticket.created_at.desc(), Ticket.id.desc())
+Index("ix_tickets_assignee_id_created_at_id", Ticket.assignee_id, Ticket.created_at.desc(), Ticket.id.desc())
+Index(
+    "ix_tickets_requester_email_lc_created_at_id",
+    Ticket.requester_email_lc, Ticket.created_at.desc(), Ticket.id.desc(),
+)
+# fila de triagem (status=open&unassigned=true): parcial, só os tickets abertos sem responsável
+Index(
+    "ix_tickets_triage_queue", Ticket.created_at.desc(), Ticket.id.desc(),
+    postgresql_where=(Ticket.status == TicketStatus.open) & Ticket.assignee_id.is_(None),
+)
+Index("ix_tickets_search_vector", Ticket.search_vector, postgresql_using="gin")
+
+
+# agregados de tickets por (status, responsável), mantidos por triggers em `tickets` na mesma
+# transação de cada escrita; cada chave tem até 8 `shard`s para não serializar escritas concorrentes.
+# Somas em segundos (epoch) permitem médias sem varrer tickets: ver app/stats.py
+ticket_stats = Table(
+    "ticket_stats",
+    Base.metadata,
+    Column("status", Enum(TicketStatus), nullable=False),
+    Column("assignee_id", UUID(as_uuid=True), nullable=True),
+    Column("shard", SmallInteger, nullable=False),
+    Column("tickets", BigInteger, nullable=False, server_default="0"),
+    Column("created_epoch_sum", BigInteger, nullable=False, server_default="0"),
+    Column("responded", BigInteger, nullable=False, server_default="0"),  # com first_response_at
+    Column("first_response_seconds_sum", BigInteger, nullable=False, server_default="0"),
+    UniqueConstraint(
+        "status", "assignee_id", "shard", name="uq_ticket_stats_key", postgresql_nulls_not_distinct=True
+    ),
+)
+
+
+def allocate_ticket_numbers(db: Session, count: int) -> list[int]:
+    """Reserva `count` números da sequence em um único round-trip (para inserts em lote)."""
+    if count <= 0:
+        return []
+    stmt = select(ticket_number_seq.next_value()).select_from(func.generate_series(1, count))
+    return list(db.execute(stmt).scalars())
 
 
 class TicketMessage(Base):
@@ -77,6 +136,22 @@ class TicketMessage(Base):
 
     ticket: Mapped["Ticket"] = relationship(back_populates="messages")
 
+    __table_args__ = (
+        # mensagens de um ticket em ordem (detalhe paginado por cursor em created_at/id)
+        Index("ix_ticket_messages_ticket_id_created_at_id", "ticket_id", "created_at", "id"),
+    )
+
+class AttachmentBlob(Base):
+    """Conteúdo de anexo endereçado pelo sha256; vários anexos podem apontar para o mesmo blob."""
+    __tablename__ = "attachment_blobs"
+
+    digest: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    ref_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 class Attachment(Base):
     __tablename__ = "attachments"
 
@@ -86,25 +161,45 @@ class Attachment(Base):
     )
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
     mime: Mapped[str] = mapped_column(String(120), nullable=False)
-    path: Mapped[str] = mapped_column(String(1024), nullable=False)  # caminho relativo no disco
+    # anexos com digest: chave do blob no storage (ver app/storage.py); antigos: caminho relativo no disco
+    path: Mapped[str] = mapped_column(String(1024), nullable=False)
     size: Mapped[int] = mapped_column(nullable=False)  # bytes
+    # None só para anexos antigos, gravados antes do armazenamento por conteúdo
+    digest: Mapped[Optional[str]] = mapped_column(
+        String(64), ForeignKey("attachment_blobs.digest"), index=True, nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     ticket: Mapped["Ticket"] = relationship(back_populates="attachments")
 
+    __table_args__ = (
+        Index("ix_attachments_ticket_id_created_at", "ticket_id", "created_at"),
+    )
+
 
 class AuditEvent(str, enum.Enum):
     ticket_created = "ticket_created"
     status_changed = "status_changed"
     assignee_changed = "assignee_changed"
     message_added = "message_added"
+    attachment_added = "attachment_added"
 
 class TicketAudit(Base):
+    """Append-only, particionada por mês em `created_at` (ver app/audit_retention.py).
+
+    A PK inclui `created_at` porque toda chave única de tabela particionada contém a chave de partição.
+    """
     __tablename__ = "ticket_audit"
+    __table_args__ = (
+        Index("ix_ticket_audit_ticket_id_created_at", "ticket_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     ticket_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False)
     actor_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     event_type: Mapped[AuditEvent] = mapped_column(Enum(AuditEvent), nullable=False)
     payload: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False
+    )
\ No newline at end of file
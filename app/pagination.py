@@ -0,0 +1,20 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """Gera um cursor opaco a partir da chave (created_at, id) do último item da página."""
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Lê um cursor gerado por `encode_cursor`; levanta ValueError se estiver malformado."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["c"]), UUID(data["i"])
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
@@ -0,0 +1,194 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+from uuid import UUID
+
+from app.cache import TTLCache
+from app.schemas import TicketStatus
+from app.settings import settings
+
+# (etag, corpo JSON já serializado)
+Entry = tuple[str, bytes]
+
+
+class ResponseCache(ABC):
+    """Respostas de GET /tickets e GET /tickets/{id} já serializadas, invalidadas pelas escritas.
+
+    Listas: cada combinação de filtros depende de uma "versão" (global, ou do status filtrado);
+    toda escrita incrementa a versão global e a dos status envolvidos (antes e depois).
+    Detalhe: todas as variantes (fields, página de mensagens) de um ticket somem juntas; cada
+    ticket tem uma versão própria e `set_detail` só grava se ela não mudou desde a leitura.
+    """
+
+    @abstractmethod
+    def list_version(self, status: Optional[TicketStatus]) -> Optional[str]:
+        """None quando o backend não enxerga as escritas de outros processos (sem ETag por versão)."""
+
+    @abstractmethod
+    def detail_version(self, ticket_id: UUID) -> str:
+        """Ler antes da query do detalhe e repassar ao `set_detail`."""
+
+    @abstractmethod
+    def get_list(self, key: str) -> Optional[Entry]: ...
+
+    @abstractmethod
+    def set_list(self, key: str, entry: Entry) -> None: ...
+
+    @abstractmethod
+    def get_detail(self, ticket_id: UUID, variant: str) -> Optional[Entry]: ...
+
+    @abstractmethod
+    def set_detail(self, ticket_id: UUID, variant: str, entry: Entry, version: str) -> None:
+        """Guarda `entry` só se o ticket não foi invalidado depois de `version` ser lido."""
+
+    @abstractmethod
+    def invalidate(self, ticket_ids: Iterable[UUID], statuses: Iterable[TicketStatus]) -> None: ...
+
+
+def _version_name(status: Optional[TicketStatus]) -> str:
+    return f"status:{TicketStatus(status).value}" if status else "all"
+
+
+# versões por ticket duram bem mais que as respostas: uma versão que expira no meio de uma
+# requisição deixaria o `set_detail` gravar um corpo antigo
+DETAIL_VERSION_TTL = 24 * 3600
+
+
+class MemoryResponseCache(ResponseCache):
+    """Por processo: só guarda detalhes. Com vários workers, uma escrita só invalida o worker que a
+    atendeu; os outros ficam no máximo `ttl` atrasados.
+
+    Listas não são guardadas nem ganham ETag por versão: contadores locais não veem as escritas
+    de outros workers, importações e scripts, e o 304 sairia errado sem limite de tempo.
+    Com `store_bodies=False` (RESPONSE_CACHE=none) nada é guardado.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, store_bodies: bool = True):
+        self.ttl = ttl
+        self.store_bodies = store_bodies
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._detail_versions = TTLCache(maxsize=maxsize, ttl=DETAIL_VERSION_TTL)
+        self._lock = threading.Lock()
+
+    def list_version(self, status):
+        return None
+
+    def get_list(self, key):
+        return None
+
+    def set_list(self, key, entry):
+        pass
+
+    def detail_version(self, ticket_id):
+        return str(self._detail_versions.get(ticket_id) or 0)
+
+    def get_detail(self, ticket_id, variant):
+        if not self.store_bodies:
+            return None
+        return (self._cache.get(("ticket", ticket_id)) or {}).get(variant)
+
+    def set_detail(self, ticket_id, variant, entry, version):
+        if not self.store_bodies:
+            return
+        with self._lock:
+            if self.detail_version(ticket_id) != version:
+                return  # escrita entre a leitura do banco e agora: o corpo já nasceu velho
+            variants = dict(self._cache.get(("ticket", ticket_id)) or {})
+            variants[variant] = entry
+            self._cache.set(("ticket", ticket_id), variants)
+
+    def invalidate(self, ticket_ids, statuses):
+        with self._lock:
+            for ticket_id in ticket_ids:
+                self._detail_versions.set(ticket_id, (self._detail_versions.get(ticket_id) or 0) + 1)
+                self._cache.pop(("ticket", ticket_id))
+
+
+class RedisResponseCache(ResponseCache):
+    """Redis (ou compatível: KeyDB, Valkey...) compartilhado entre workers; invalidação imediata.
+
+    Requer `redis` (dependência opcional, só importada quando este backend é usado).
+    """
+
+    PREFIX = "sd:rc:"
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            import redis
+        except ImportError as exc:  # pragma: no cover - depende do ambiente
+            raise RuntimeError("RESPONSE_CACHE=redis requer o pacote redis") from exc
+        self.client = redis.Redis.from_url(url)
+        self.ttl = max(int(ttl), 1)
+        # compare-and-set atômico: grava a variante só se a versão do ticket ainda é a lida
+        self._set_detail_if_version = self.client.register_script("""
+            if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then return 0 end
+            redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+            redis.call('EXPIRE', KEYS[2], ARGV[4])
+            return 1
+        """)
+
+    @staticmethod
+    def _encode(entry: Entry) -> bytes:
+        etag, body = entry
+        return etag.encode() + b"\n" + body
+
+    @staticmethod
+    def _decode(raw: Optional[bytes]) -> Optional[Entry]:
+        if raw is None:
+            return None
+        etag, _, body = raw.partition(b"\n")
+        return etag.decode(), body
+
+    def list_version(self, status):
+        return (self.client.get(f"{self.PREFIX}v:{_version_name(status)}") or b"0").decode()
+
+    def get_list(self, key):
+        return self._decode(self.client.get(f"{self.PREFIX}list:{key}"))
+
+    def set_list(self, key, entry):
+        self.client.set(f"{self.PREFIX}list:{key}", self._encode(entry), ex=self.ttl)
+
+    def detail_version(self, ticket_id):
+        return (self.client.get(f"{self.PREFIX}v:ticket:{ticket_id}") or b"0").decode()
+
+    def get_detail(self, ticket_id, variant):
+        return self._decode(self.client.hget(f"{self.PREFIX}ticket:{ticket_id}", variant))
+
+    def set_detail(self, ticket_id, variant, entry, version):
+        self._set_detail_if_version(
+            keys=[f"{self.PREFIX}v:ticket:{ticket_id}", f"{self.PREFIX}ticket:{ticket_id}"],
+            args=[version, variant, self._encode(entry), self.ttl],
+        )
+
+    def invalidate(self, ticket_ids, statuses):
+        pipe = self.client.pipeline()
+        for name in {"all", *(_version_name(s) for s in statuses)}:
+            pipe.incr(f"{self.PREFIX}v:{name}")
+        for ticket_id in ticket_ids:
+            pipe.incr(f"{self.PREFIX}v:ticket:{ticket_id}")
+            pipe.expire(f"{self.PREFIX}v:ticket:{ticket_id}", DETAIL_VERSION_TTL)
+            pipe.delete(f"{self.PREFIX}ticket:{ticket_id}")
+        pipe.execute()
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Backend configurado em `settings.response_cache` (instanciado uma vez por processo)."""
+    global _cache
+    if _cache is None:
+        if settings.response_cache == "redis":
+            _cache = RedisResponseCache(settings.response_cache_url, settings.response_cache_ttl_seconds)
+        else:
+            _cache = MemoryResponseCache(
+                settings.response_cache_size,
+                settings.response_cache_ttl_seconds,
+                store_bodies=settings.response_cache == "memory",
+            )
+    return _cache
+
+
+def invalidate_tickets(ticket_ids: Iterable[UUID] = (), statuses: Iterable[TicketStatus] = ()) -> None:
+    """Chamar depois do commit de qualquer escrita em tickets, com os status afetados (antigos e novos)."""
+    get_response_cache().invalidate(list(ticket_ids), [s for s in statuses if s is not None])
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
-from app.db import get_db
+from app.db import get_db, run_db, DbSession
 from app.models import User
 from app.security import create_token
 
@@ -13,10 +13,13 @@ class LoginIn(BaseModel):
 class LoginOut(BaseModel):
     token: str
 
-@router.post("/login", response_model=LoginOut)
-def login(payload: LoginIn, db: Session = Depends(get_db)):
+def _login(db: Session, payload: LoginIn) -> LoginOut:
     user = db.query(User).filter(User.email == payload.email).first()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     token = create_token(user_id=str(user.id), role=user.role.value)
     return LoginOut(token=token)
+
+@router.post("/login", response_model=LoginOut)
+async def login(payload: LoginIn, db: DbSession = Depends(get_db)):
+    return await run_db(db, _login, payload)
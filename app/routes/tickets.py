@@ -1,190 +1,683 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime
 from uuid import UUID
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import select, func, or_
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy import String, any_, bindparam, select, func, tuple_, update, or_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from pathlib import Path
+from typing import Literal
 
-from app.db import get_db
-from app.models import Ticket, TicketMessage, User, TicketAudit, AuditEvent, Attachment
+from app.audit import record_audit, record_audits
+from app.counts import cached_count, estimate_ticket_count, invalidate_counts, store_count
+from app.db import SessionLocal, get_db, run_db, DbSession
+from app.models import Ticket, TicketMessage, User, TicketAudit, AuditEvent, Attachment, AttachmentBlob
 from app.schemas import (
     TicketCreate, TicketOut, TicketStatusUpdate, TicketAssigneeUpdate,
     TicketMessageCreate, TicketMessageOut, TicketDetailOut, TicketStatus,
-    TicketListOut, TicketAuditOut, AttachmentOut
+    TicketListOut, TicketAuditPage, AttachmentOut, TicketSearchHit, TicketSearchOut,
+    TicketBulkUpdate, TicketBulkResult, TicketImportResult, TicketStatsOut,
+    TicketLookupRequest, TicketLookupMatch, TicketLookupOut,
 )
 
-from app.security import require_agent, require_admin, require_agent_or_admin, get_current_user, TokenData
+from app.events import change_feed
+from app.http_cache import etag_matches, make_etag
+from app.ingest import TicketImport, insert_batch
+from app.pagination import encode_cursor, decode_cursor
+from app.response_cache import get_response_cache, invalidate_tickets
+from app.serialization import FastJSONResponse, dumps, validated
+from app.search import build_tsquery, search_filter, search_rank
+from app.settings import settings
+from app.stats import BACKLOG_STATUSES, ticket_stats_summary
+from app.security import require_admin, require_agent_or_admin
+from app.storage import LocalStorage, StoredBlob, blob_key, get_storage, store_blob
 
 
 router = APIRouter()
-UPLOAD_ROOT = Path("uploads")
-
-def _audit(db: Session, *, ticket_id: UUID, event: AuditEvent, actor_id: UUID | None, payload: dict):
-    rec = TicketAudit(ticket_id=ticket_id, event_type=event, actor_id=actor_id, payload=payload or {})
-    db.add(rec)
-    # não faz commit aqui; cada rota decide quando commitar
-    return rec
 
+# colunas de TicketOut, para montar a resposta direto do RETURNING
+TICKET_OUT_COLUMNS = (
+    Ticket.id, Ticket.number, Ticket.title, Ticket.description,
+    Ticket.requester_name, Ticket.requester_email, Ticket.status,
+)
+TICKET_OUT_FIELDS = tuple(c.key for c in TICKET_OUT_COLUMNS)
 
-def next_ticket_number(db: Session) -> int:
-    max_num = db.execute(select(func.max(Ticket.number))).scalar()
-    return (max_num or 999) + 1
+def _audit(db: Session, *, ticket_id: UUID, event: AuditEvent, actor_id: UUID | None, payload: dict):
+    # não faz commit aqui; cada rota decide quando commitar (em AUDIT_MODE=queue só sai depois do commit)
+    record_audit(db, ticket_id=ticket_id, event=event, actor_id=actor_id, payload=payload)
 
 
 # ---------- Create ----------
-@router.post("", response_model=TicketOut, status_code=201, dependencies=[Depends(require_agent_or_admin)])
-def create_ticket(payload: TicketCreate, db: Session = Depends(get_db)):
+def _create_ticket(db: Session, payload: TicketCreate) -> TicketOut:
+    # number vem da sequence tickets_number_seq (default no banco)
     t = Ticket(
-        number=next_ticket_number(db),
         title=payload.title,
         description=payload.description,
         requester_name=payload.requester_name,
         requester_email=payload.requester_email,
     )
     db.add(t)
+    db.flush()  # INSERT ... RETURNING number/created_at (eager_defaults), sem refresh depois
+
+    # auditoria: ticket_created
+    _audit(
+        db,
+        ticket_id=t.id,
+        event=AuditEvent.ticket_created,
+        actor_id=None,  # se tiver auth, passe o id do usuário autenticado
+        payload={
+            "number": t.number,
+            "title": t.title,
+            "requester_email": t.requester_email
+        },
+    )
     db.commit()
-    db.refresh(t)
-    return t
+    invalidate_counts([t.status])
+    invalidate_tickets([t.id], [t.status])
+    return TicketOut.model_validate(t)
+
+
+@router.post("", response_model=TicketOut, status_code=201, dependencies=[Depends(require_agent_or_admin)])
+async def create_ticket(payload: TicketCreate, db: DbSession = Depends(get_db)):
+    return await run_db(db, _create_ticket, payload)
+
+
+# ---------- Importação em massa ----------
+@router.post("/import", response_model=TicketImportResult, dependencies=[Depends(require_admin)])
+async def import_tickets(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: DbSession = Depends(get_db),
+):
+    """Importa tickets de um corpo NDJSON ou CSV (com cabeçalho), lido em streaming.
+
+    Cada lote é validado com `TicketCreate` e inserido com um INSERT multi-row; linhas inválidas
+    são puladas e reportadas em `errors`. Lotes já inseridos ficam gravados mesmo se houver falhas.
+    """
+    job = TicketImport(format, settings.import_batch_size)
+    async for chunk in request.stream():
+        for batch in job.feed(chunk):
+            job.result.inserted += await run_db(db, insert_batch, batch)
+    for batch in job.finish():
+        job.result.inserted += await run_db(db, insert_batch, batch)
+    invalidate_counts([TicketStatus.open])
+    invalidate_tickets(statuses=[TicketStatus.open])
+    return job.result
+
+
+# ---------- Change feed (SSE) ----------
+@router.get("/feed", dependencies=[Depends(require_agent_or_admin)])
+async def ticket_feed(status: Optional[TicketStatus] = None, assignee_id: Optional[UUID] = None):
+    """Server-Sent Events com as mudanças de tickets (criação, status, assignee, mensagens, anexos).
+
+    Substitui o polling do dashboard: um LISTEN por nó, repassado a todos os clientes conectados.
+    """
+    sub = change_feed.subscribe(status=status.value if status else None, assignee_id=assignee_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.get(), timeout=settings.feed_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # mantém proxies/load balancers com a conexão aberta
+                    continue
+                if event is None:
+                    break
+                yield f"id: {event['id']}\nevent: {event['event_type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            sub.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------- Painel da fila ----------
+@router.get("/stats", response_model=TicketStatsOut, dependencies=[Depends(require_agent_or_admin)])
+async def ticket_stats(db: DbSession = Depends(get_db)):
+    """Contagens por status/responsável, idade do backlog e primeira resposta, dos agregados em ticket_stats."""
+    return await run_db(db, ticket_stats_summary)
+
+
+# ---------- Lookup por solicitante ----------
+def _lookup_statement(emails: list[str], statuses: list[TicketStatus], limit_per_email: int):
+    """Tickets de vários solicitantes numa query: `requester_email_lc = ANY(:emails)` (um único
+    parâmetro array, plano igual para qualquer tamanho de lote), até `limit_per_email` por e-mail."""
+    rn = func.row_number().over(
+        partition_by=Ticket.requester_email_lc, order_by=(Ticket.created_at.desc(), Ticket.id.desc())
+    ).label("rn")
+    matches = (
+        select(*TICKET_OUT_COLUMNS, Ticket.requester_email_lc, rn)
+        .where(Ticket.requester_email_lc == any_(bindparam("emails", emails, type_=ARRAY(String))))
+        .where(Ticket.status.in_(statuses))
+        .subquery()
+    )
+    return (
+        select(matches)
+        .where(matches.c.rn <= limit_per_email)
+        .order_by(matches.c.requester_email_lc, matches.c.rn)
+    )
+
+
+def _lookup_tickets(db: Session, payload: TicketLookupRequest) -> TicketLookupOut:
+    emails = list(dict.fromkeys(_normalize_email(e) for e in payload.emails if e.strip()))
+    found: dict[str, list[TicketOut]] = {email: [] for email in emails}
+    if emails:
+        stmt = _lookup_statement(emails, payload.statuses or list(BACKLOG_STATUSES), payload.limit_per_email)
+        for row in db.execute(stmt):
+            found[row.requester_email_lc].append(TicketOut.model_validate(row))
+    return TicketLookupOut(results=[TicketLookupMatch(email=e, tickets=t) for e, t in found.items()])
+
+
+@router.post("/lookup", response_model=TicketLookupOut, dependencies=[Depends(require_agent_or_admin)])
+async def lookup_tickets(payload: TicketLookupRequest, db: DbSession = Depends(get_db)):
+    """Tickets em aberto (ou nos `statuses` pedidos) de até 1000 solicitantes, numa query indexada.
+
+    Para ingestão de e-mail: um round-trip por lote de mensagens para achar a thread de cada remetente.
+    """
+    return await run_db(db, _lookup_tickets, payload)
+
+
+# ---------- Busca (ranqueada) ----------
+# declarada antes de /{ticket_id} para "search" não cair na rota de detalhe
+def _search_tickets(db: Session, q: str, limit: int) -> TicketSearchOut:
+    tsquery = build_tsquery(q)
+    if tsquery is None:
+        return TicketSearchOut(items=[], limit=limit)
+
+    rank = search_rank(tsquery).label("rank")
+    rows = db.execute(
+        select(Ticket, rank)
+        .where(search_filter(tsquery))
+        .order_by(rank.desc(), Ticket.created_at.desc())
+        .limit(limit)
+    ).all()
+    items = [TicketSearchHit(**TicketOut.model_validate(t).model_dump(), rank=r) for t, r in rows]
+    return TicketSearchOut(items=items, limit=limit)
+
+
+@router.get("/search", response_model=TicketSearchOut)
+async def search_tickets(q: str, limit: int = 20, db: DbSession = Depends(get_db)):
+    """Busca full-text em título, descrição e mensagens, ordenada por relevância."""
+    limit = max(1, min(limit, 100))
+    return await run_db(db, _search_tickets, q, limit)
 
 
 # ---------- Detail (inclui mensagens internas) ----------
-@router.get("/{ticket_id}", response_model=TicketDetailOut)
-def get_ticket(ticket_id: UUID, db: Session = Depends(get_db)):
-    t = db.query(Ticket).options(
-        joinedload(Ticket.messages),
-        joinedload(Ticket.attachments)
-    ).filter(Ticket.id == ticket_id).first()
-    if not t:
+def _cached_response(etag: str, body: bytes, if_none_match: Optional[str]) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# campos escalares do detalhe (colunas de tickets); messages/attachments vêm de queries próprias
+DETAIL_COLUMNS = ("id", "number", "title", "description", "requester_name", "requester_email", "status")
+DETAIL_FIELDS = frozenset(TicketDetailOut.model_fields)
+ATTACHMENT_OUT_COLUMNS = tuple(Attachment.__table__.c[f] for f in AttachmentOut.model_fields)
+
+
+def _get_ticket(
+    db: Session,
+    ticket_id: UUID,
+    fields: frozenset[str],
+    messages_limit: int,
+    messages_after: Optional[tuple],
+    variant: str,
+    if_none_match: Optional[str],
+) -> tuple[str, Optional[dict]]:
+    """Uma query por parte pedida em `fields` (ticket, mensagens, anexos), sem JOIN entre as listas.
+
+    O ETag sai de `updated_at` (mensagens e anexos também o atualizam): se bater com
+    `if_none_match`, volta `(etag, None)` logo depois da primeira query.
+    Devolve o payload como dict das linhas (só as chaves de `fields`), sem validar no schema.
+    """
+    columns = [getattr(Ticket, f) for f in DETAIL_COLUMNS if f in fields]
+    row = db.execute(select(Ticket.updated_at, *columns).where(Ticket.id == ticket_id)).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    return t
+    data = dict(row._mapping)
+    etag = make_etag(ticket_id, data.pop("updated_at").isoformat(), variant)
+    if etag_matches(if_none_match, etag):
+        return etag, None
+
+    if "messages" in fields:
+        stmt = (
+            select(TicketMessage.id, TicketMessage.author_id, TicketMessage.body, TicketMessage.created_at)
+            .where(TicketMessage.ticket_id == ticket_id)
+            .order_by(TicketMessage.created_at.asc(), TicketMessage.id.asc())
+            .limit(messages_limit)
+        )
+        if messages_after is not None:
+            stmt = stmt.where(tuple_(TicketMessage.created_at, TicketMessage.id) > messages_after)
+        messages = db.execute(stmt).all()
+        data["messages"] = [m._asdict() for m in messages]
+        data["messages_next_cursor"] = (
+            encode_cursor(messages[-1].created_at, messages[-1].id) if len(messages) == messages_limit else None
+        )
+
+    if "attachments" in fields:
+        attachments = db.execute(
+            select(*ATTACHMENT_OUT_COLUMNS)
+            .where(Attachment.ticket_id == ticket_id)
+            .order_by(Attachment.created_at.asc())
+        ).all()
+        data["attachments"] = [a._asdict() for a in attachments]
+
+    if fields == DETAIL_FIELDS:
+        return etag, validated(TicketDetailOut, data)
+    return etag, data
+
+
+@router.get(
+    "/{ticket_id}",
+    response_model=TicketDetailOut,
+    responses={200: {"description": "Com `fields`, só os campos pedidos de TicketDetailOut"}},
+)
+async def get_ticket(
+    ticket_id: UUID,
+    request: Request,
+    fields: Optional[str] = None,
+    messages_limit: int = 50,
+    messages_cursor: Optional[str] = None,
+    db: DbSession = Depends(get_db),
+):
+    """Detalhe do ticket com a primeira página de mensagens (mais antigas primeiro) e os anexos.
+
+    `fields=id,title,status` devolve só esses campos (e pula as queries de mensagens/anexos se
+    não forem pedidos). Próximas páginas de mensagens: `messages_cursor=<messages_next_cursor>`.
+    Suporta `If-None-Match` (304 sem carregar mensagens/anexos).
+    """
+    wanted = DETAIL_FIELDS
+    if fields:
+        wanted = frozenset(f.strip() for f in fields.split(",") if f.strip())
+        unknown = wanted - DETAIL_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        if "messages" in wanted:
+            wanted |= {"messages_next_cursor"}
+    messages_limit = max(1, min(messages_limit, 200))
+
+    after = None
+    if messages_cursor:
+        try:
+            after = decode_cursor(messages_cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if_none_match = request.headers.get("if-none-match")
+    variant = f"{','.join(sorted(wanted))}|{messages_limit}|{messages_cursor or ''}"
+    cache = get_response_cache()
+    cached = cache.get_detail(ticket_id, variant)
+    if cached is None:
+        version = cache.detail_version(ticket_id)  # antes da query: ver set_detail
+        etag, out = await run_db(
+            db, _get_ticket, ticket_id, wanted, messages_limit, after, variant, if_none_match
+        )
+        if out is None:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+        body = dumps(out)
+        cache.set_detail(ticket_id, variant, (etag, body), version)
+    else:
+        etag, body = cached
+    return _cached_response(etag, body, if_none_match)
 
 
 # ---------- Update status ----------
-@router.patch("/{ticket_id}/status", response_model=TicketOut, dependencies=[Depends(require_agent_or_admin)])
-def update_status(ticket_id: UUID, payload: TicketStatusUpdate, db: Session = Depends(get_db)):
-    t = db.get(Ticket, ticket_id)
-    if not t:
+def _update_returning_old(db: Session, ticket_id: UUID, column, value):
+    """UPDATE de uma coluna devolvendo a linha nova + o valor antigo, num único round-trip."""
+    prev = select(Ticket.id, column.label("previous")).where(Ticket.id == ticket_id).with_for_update().subquery("prev")
+    stmt = (
+        update(Ticket)
+        .where(Ticket.id == prev.c.id)
+        .values({column.key: value})
+        .returning(*TICKET_OUT_COLUMNS, prev.c.previous)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).first()
+
+
+def _update_status(db: Session, ticket_id: UUID, payload: TicketStatusUpdate) -> TicketOut:
+    row = _update_returning_old(db, ticket_id, Ticket.status, payload.status)
+    if row is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    old = t.status
-    t.status = payload.status
 # auditoria: status_changed
     _audit(
         db,
-        ticket_id=t.id,
+        ticket_id=row.id,
         event=AuditEvent.status_changed,
         actor_id=None,
-        payload={"from": str(old), "to": str(t.status)},
+        payload={"from": str(row.previous), "to": str(row.status)},
     )
     
     db.commit()
-    db.refresh(t)
-    return t
+    invalidate_counts([row.previous, row.status])
+    invalidate_tickets([row.id], [row.previous, row.status])
+    return TicketOut.model_validate(row)
+
+
+@router.patch("/{ticket_id}/status", response_model=TicketOut, dependencies=[Depends(require_agent_or_admin)])
+async def update_status(ticket_id: UUID, payload: TicketStatusUpdate, db: DbSession = Depends(get_db)):
+    return await run_db(db, _update_status, ticket_id, payload)
 
 
 # ---------- List + filtros ----------
+def _normalize_email(email: str) -> str:
+    """Mesma normalização da coluna gerada `requester_email_lc` (lower), sem espaços nas pontas."""
+    return email.strip().lower()
+
+
 def _build_filters(
     q: Optional[str],
     status: Optional[TicketStatus],
     assignee_id: Optional[UUID],
+    unassigned: bool = False,
+    requester_email: Optional[str] = None,
 ):
     filters = []
-    if q:
-        like = f"%{q}%"
-        filters.append(or_(Ticket.title.ilike(like), Ticket.description.ilike(like)))
+    tsquery = build_tsquery(q)
+    if tsquery is not None:
+        # full-text (GIN em search_vector): título, descrição e mensagens, por prefixo de palavra
+        filters.append(search_filter(tsquery))
     if status:
         filters.append(Ticket.status == status)
     if assignee_id is not None:
         filters.append(Ticket.assignee_id == assignee_id)
+    if unassigned:
+        filters.append(Ticket.assignee_id.is_(None))
+    if requester_email:
+        filters.append(Ticket.requester_email_lc == _normalize_email(requester_email))
     return filters
 
 
+def _filter_key(
+    q: Optional[str],
+    status: Optional[TicketStatus],
+    assignee_id: Optional[UUID],
+    unassigned: bool = False,
+    requester_email: Optional[str] = None,
+) -> tuple:
+    """Chave normalizada dos filtros de `_build_filters` (usada no cache de contagens)."""
+    return (
+        q.strip().lower() if q else None,
+        status.value if status else None,
+        str(assignee_id) if assignee_id is not None else None,
+        unassigned,
+        _normalize_email(requester_email) if requester_email else None,
+    )
+
+
+def _count_tickets(db: Session, filters: list, key: tuple, mode: str) -> tuple[Optional[int], str]:
+    """Resolve o `total` da listagem conforme `total_mode`; retorna (total, modo efetivo)."""
+    if mode == "none":
+        return None, "none"
+
+    q, status, assignee_id, unassigned, requester = key
+    if mode == "estimate" and q is None and assignee_id is None and not unassigned and requester is None:
+        estimate = estimate_ticket_count(db, TicketStatus(status) if status else None)
+        if estimate is not None:
+            return estimate, "estimate"
+
+    total = cached_count(key)
+    if total is None:
+        total = db.scalar(select(func.count()).select_from(Ticket).where(*filters)) or 0
+        store_count(key, total)
+    return total, "exact"
+
+
+def _list_statement(filters: list, page: int, limit: int, after: Optional[tuple]):
+    """SELECT da listagem; a ordem (created_at DESC, id DESC) casa com os índices compostos de tickets.
+
+    Só as colunas de TicketOut (+ created_at do cursor), como tuplas: sem entidades no identity map.
+    """
+    stmt = (
+        select(*TICKET_OUT_COLUMNS, Ticket.created_at)
+        .where(*filters)
+        .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        return stmt.where(tuple_(Ticket.created_at, Ticket.id) < after)
+    return stmt.offset((page - 1) * limit)
+
+
+def _list_tickets(
+    db: Session,
+    q: Optional[str],
+    status: Optional[TicketStatus],
+    assignee_id: Optional[UUID],
+    unassigned: bool,
+    requester_email: Optional[str],
+    page: int,
+    limit: int,
+    after: Optional[tuple],
+    total_mode: str,
+) -> dict:
+    """Payload de TicketListOut montado das tuplas do SELECT (sem validar cada item no schema)."""
+    filters = _build_filters(q, status, assignee_id, unassigned, requester_email)
+    key = _filter_key(q, status, assignee_id, unassigned, requester_email)
+
+    total, total_mode = _count_tickets(db, filters, key, total_mode)
+
+    rows = db.execute(_list_statement(filters, page, limit, after)).all()
+
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    # zip para em TICKET_OUT_FIELDS: created_at (só do cursor) fica de fora
+    items = [dict(zip(TICKET_OUT_FIELDS, row)) for row in rows]
+    return validated(TicketListOut, dict(
+        items=items, page=page, limit=limit, total=total, total_mode=total_mode, next_cursor=next_cursor,
+    ))
+
+
 @router.get("", response_model=TicketListOut)
-def list_tickets(
+async def list_tickets(
+    request: Request,
     q: Optional[str] = None,
     status: Optional[TicketStatus] = None,
     assignee_id: Optional[UUID] = None,
+    unassigned: bool = False,
+    requester_email: Optional[str] = None,
     page: int = 1,
     limit: int = 20,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    total_mode: Literal["exact", "estimate", "none"] = "exact",
+    db: DbSession = Depends(get_db),
 ):
-    page = max(page, 1)
-    limit = max(1, min(limit, 100))
+    """Lista tickets (mais recentes primeiro).
 
-    filters = _build_filters(q, status, assignee_id)
+    `unassigned=true`: só tickets sem responsável (com `status=open`, a fila de triagem).
+    `requester_email`: tickets do solicitante (sem diferenciar maiúsculas).
 
-    total = db.scalar(select(func.count()).select_from(Ticket).where(*filters)) or 0
+    Paginação por `page` (offset) ou por `cursor` (keyset em created_at/id). Com cursor,
+    o custo de qualquer página é o mesmo da primeira; use o `next_cursor` da resposta.
 
-    stmt = (
-        select(Ticket)
-        .where(*filters)
-        .order_by(Ticket.created_at.desc())
-        .offset((page - 1) * limit)
-        .limit(limit)
-    )
-    items = db.execute(stmt).scalars().all()
+    `total_mode`: `exact` (COUNT com cache curto), `estimate` (estatísticas do planner, só
+    sem filtros ou com apenas `status`) ou `none` (não conta; `total` vem nulo).
 
-    return TicketListOut(items=items, page=page, limit=limit, total=total)
+    Com RESPONSE_CACHE=redis o ETag vem da versão da listagem (muda a cada escrita em tickets do
+    status filtrado, ou em qualquer ticket sem filtro de status) e um `If-None-Match` igual devolve
+    304 sem ir ao banco; nos outros modos o ETag é o hash da resposta.
+    """
+    page = max(page, 1)
+    limit = max(1, min(limit, 100))
+    if unassigned and assignee_id is not None:
+        raise HTTPException(status_code=400, detail="Use either assignee_id or unassigned")
+
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    cache = get_response_cache()
+    if_none_match = request.headers.get("if-none-match")
+    version = cache.list_version(status)
+    if version is not None:
+        # versão compartilhada (redis): o 304 e o cache saem sem consultar o banco
+        filters = _filter_key(q, status, assignee_id, unassigned, requester_email)
+        etag = make_etag("list", version, f"{filters}|{page}|{limit}|{cursor or ''}|{total_mode}")
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+        cached = cache.get_list(etag)
+        if cached is not None:
+            return _cached_response(*cached, if_none_match)
+
+    out = await run_db(
+        db, _list_tickets, q, status, assignee_id, unassigned, requester_email, page, limit, after, total_mode,
+    )
+    body = dumps(out)
+    if version is None:
+        # sem versão compartilhada o ETag vem do próprio corpo: o 304 só economiza a transferência
+        return _cached_response(make_etag("list", hashlib.sha1(body).hexdigest()), body, if_none_match)
+    cache.set_list(etag, (etag, body))
+    return _cached_response(etag, body, if_none_match)
 
 
 # ---------- Atribuição ----------
-@router.patch("/{ticket_id}/assignee", response_model=TicketOut, dependencies=[Depends(require_agent_or_admin)])
-def update_assignee(ticket_id: UUID, payload: TicketAssigneeUpdate, db: Session = Depends(get_db)):
-    t = db.get(Ticket, ticket_id)
-
-    if not t:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    
-    old = str(t.assignee_id) if t.assignee_id else None
-
+def _update_assignee(db: Session, ticket_id: UUID, payload: TicketAssigneeUpdate) -> TicketOut:
     if payload.assignee_id:
-        user = db.get(User, payload.assignee_id)
-        if not user:
+        if db.get(User, payload.assignee_id) is None:
             raise HTTPException(status_code=400, detail="Assignee not found")
-        t.assignee_id = user.id
-    else:
-        t.assignee_id = None
+
+    row = _update_returning_old(db, ticket_id, Ticket.assignee_id, payload.assignee_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
 
 # auditoria: assignee_changed
     _audit(
         db,
-        ticket_id=t.id,
+        ticket_id=row.id,
         event=AuditEvent.assignee_changed,
         actor_id=payload.assignee_id,  # quem foi setado (ou None)
-        payload={"from": old, "to": str(t.assignee_id) if t.assignee_id else None},
+        payload={
+            "from": str(row.previous) if row.previous else None,
+            "to": str(payload.assignee_id) if payload.assignee_id else None,
+        },
     )
 
     db.commit()
+    invalidate_counts([row.status])
+    invalidate_tickets([row.id], [row.status])
+    return TicketOut.model_validate(row)
 
-    db.refresh(t)
 
-    # auditoria: ticket_created
-    _audit(
-        db,
-        ticket_id=t.id,
-        event=AuditEvent.ticket_created,
-        actor_id=None,  # se tiver auth, passe o id do usuário autenticado
-        payload={
-            "number": t.number,
-            "title": t.title,
-            "requester_email": t.requester_email
-        },
-)
-    db.commit()  # confirma também a auditoria
-    
-    return t
+@router.patch("/{ticket_id}/assignee", response_model=TicketOut, dependencies=[Depends(require_agent_or_admin)])
+async def update_assignee(ticket_id: UUID, payload: TicketAssigneeUpdate, db: DbSession = Depends(get_db)):
+    return await run_db(db, _update_assignee, ticket_id, payload)
+
+
+# ---------- Operações em lote ----------
+def _bulk_update(db: Session, payload: TicketBulkUpdate) -> TicketBulkResult:
+    if payload.ids is not None:
+        where = [Ticket.id.in_(payload.ids)]
+    else:
+        f = payload.filter
+        where = _build_filters(f.q, f.status, f.assignee_id, f.unassigned, f.requester_email)
+        if not where:
+            raise HTTPException(status_code=400, detail="Filter must have at least one criterion")
+
+    values = {}
+    changed = []
+    if payload.status is not None:
+        values["status"] = payload.status
+        changed.append(Ticket.status != payload.status)
+    if "assignee_id" in payload.model_fields_set:
+        if payload.assignee_id is not None and db.get(User, payload.assignee_id) is None:
+            raise HTTPException(status_code=400, detail="Assignee not found")
+        values["assignee_id"] = payload.assignee_id
+        changed.append(Ticket.assignee_id.is_distinct_from(payload.assignee_id))
+
+    # trava só as linhas que realmente mudam e guarda os valores antigos para a auditoria
+    max_rows = settings.bulk_max_tickets
+    old = (
+        select(Ticket.id, Ticket.status, Ticket.assignee_id)
+        .where(*where, or_(*changed))
+        .order_by(Ticket.id)  # ordem fixa de travamento: dois lotes sobrepostos não dão deadlock
+        .limit(max_rows + 1)
+        .with_for_update()
+        .subquery("old")
+    )
+    stmt = (
+        update(Ticket)
+        .where(Ticket.id == old.c.id)
+        .values(**values)
+        .returning(Ticket.id, old.c.status, old.c.assignee_id)
+        .execution_options(synchronize_session=False)
+    )
+    rows = db.execute(stmt).all()
+    if len(rows) > max_rows:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Too many tickets (max {max_rows} per request)")
+
+    audits = []
+    for ticket_id, old_status, old_assignee in rows:
+        if payload.status is not None and old_status != payload.status:
+            audits.append(dict(
+                ticket_id=ticket_id,
+                event_type=AuditEvent.status_changed,
+                actor_id=None,
+                payload={"from": str(old_status), "to": str(payload.status)},
+            ))
+        if "assignee_id" in values and old_assignee != payload.assignee_id:
+            audits.append(dict(
+                ticket_id=ticket_id,
+                event_type=AuditEvent.assignee_changed,
+                actor_id=payload.assignee_id,
+                payload={
+                    "from": str(old_assignee) if old_assignee else None,
+                    "to": str(payload.assignee_id) if payload.assignee_id else None,
+                },
+            ))
+    # um único INSERT multi-row para todas as auditorias (ou um lote na fila, em AUDIT_MODE=queue)
+    record_audits(db, audits)
+
+    db.commit()
+    statuses = {r[1] for r in rows} | {payload.status}
+    invalidate_counts(statuses)
+    invalidate_tickets([r[0] for r in rows], statuses)
+    return TicketBulkResult(updated=len(rows), ids=[r[0] for r in rows])
+
+
+@router.patch("/bulk", response_model=TicketBulkResult, dependencies=[Depends(require_agent_or_admin)])
+async def bulk_update(payload: TicketBulkUpdate, db: DbSession = Depends(get_db)):
+    """Altera status e/ou responsável de vários tickets numa transação (UPDATE ... RETURNING)."""
+    return await run_db(db, _bulk_update, payload)
 
 
 # ---------- Mensagens internas ----------
-@router.post("/{ticket_id}/messages", response_model=TicketMessageOut, status_code=201, dependencies=[Depends(require_agent_or_admin)])
-def add_message(ticket_id: UUID, payload: TicketMessageCreate, db: Session = Depends(get_db)):
-    ticket = db.get(Ticket, ticket_id)
-    if not ticket:
+def _touch_ticket(db: Session, ticket_id: UUID) -> Optional[TicketStatus]:
+    """Avança `updated_at` (muda o ETag do detalhe); None se o ticket não existe."""
+    return db.execute(
+        update(Ticket)
+        .where(Ticket.id == ticket_id)
+        .values(updated_at=func.now())
+        .returning(Ticket.status)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+
+
+def _add_message(db: Session, ticket_id: UUID, payload: TicketMessageCreate) -> TicketMessageOut:
+    # o UPDATE de updated_at também serve de checagem de existência do ticket
+    status = _touch_ticket(db, ticket_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
-
-    author = db.get(User, payload.author_id)
-    if not author:
+    if not db.scalar(select(select(User.id).where(User.id == payload.author_id).exists())):
         raise HTTPException(status_code=400, detail="Author not found")
 
     msg = TicketMessage(ticket_id=ticket_id, author_id=payload.author_id, body=payload.body)
@@ -201,60 +694,212 @@ def add_message(ticket_id: UUID, payload: TicketMessageCreate, db: Session = Dep
     )
 
     db.commit()
-    db.refresh(msg)
-    return msg
+    # a mensagem entra na busca (q=): só as contagens de busca do status do ticket mudam
+    invalidate_counts([status], search_only=True)
+    invalidate_tickets([ticket_id], [status])
+    return TicketMessageOut.model_validate(msg)
 
-@router.get("/{ticket_id}/audit", response_model=list[TicketAuditOut], dependencies=[Depends(require_admin)])
-def get_audit(ticket_id: UUID, db: Session = Depends(get_db)):
-    t = db.get(Ticket, ticket_id)
-    if not t:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    rows = db.execute(
-        select(TicketAudit).where(TicketAudit.ticket_id == ticket_id).order_by(TicketAudit.created_at.asc())
-    ).scalars().all()
-    return rows
 
+@router.post("/{ticket_id}/messages", response_model=TicketMessageOut, status_code=201, dependencies=[Depends(require_agent_or_admin)])
+async def add_message(ticket_id: UUID, payload: TicketMessageCreate, db: DbSession = Depends(get_db)):
+    return await run_db(db, _add_message, ticket_id, payload)
 
-@router.post("/{ticket_id}/attachments", response_model=AttachmentOut, status_code=201,
-             dependencies=[Depends(require_agent_or_admin)])
-def upload_attachment(ticket_id: UUID, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    t = db.get(Ticket, ticket_id)
-    if not t:
+
+# ---------- Auditoria ----------
+AUDIT_STREAM_YIELD_PER = 1000
+
+
+def _audit_query(
+    ticket_id: UUID,
+    event_type: Optional[list[AuditEvent]],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    after: Optional[tuple],
+):
+    # colunas em vez de entidades: nada vai para o identity map (memória constante no streaming);
+    # são exatamente os campos de TicketAuditOut, então cada linha vira o item da resposta
+    stmt = (
+        select(*TicketAudit.__table__.c)
+        .where(TicketAudit.ticket_id == ticket_id)
+        .order_by(TicketAudit.created_at.asc(), TicketAudit.id.asc())
+    )
+    if event_type:
+        stmt = stmt.where(TicketAudit.event_type.in_(event_type))
+    # limites em created_at também deixam o planner descartar partições inteiras
+    if since is not None:
+        stmt = stmt.where(TicketAudit.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(TicketAudit.created_at < until)
+    if after is not None:
+        stmt = stmt.where(tuple_(TicketAudit.created_at, TicketAudit.id) > after)
+    return stmt
+
+
+def _get_audit(db: Session, ticket_id: UUID, stmt, limit: int) -> dict:
+    _ensure_ticket(db, ticket_id)
+    rows = db.execute(stmt.limit(limit)).all()
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return validated(TicketAuditPage, dict(
+        items=[r._asdict() for r in rows], limit=limit, next_cursor=next_cursor,
+    ))
+
+
+def _stream_audit(stmt):
+    """NDJSON linha a linha a partir de um cursor no servidor, numa sessão própria.
+
+    Gerador síncrono: o StreamingResponse itera no threadpool, então o fetch não bloqueia o loop.
+    """
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=AUDIT_STREAM_YIELD_PER))
+        for row in result:
+            yield dumps(row._asdict()) + b"\n"
+
+
+@router.get(
+    "/{ticket_id}/audit",
+    response_model=TicketAuditPage,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+    dependencies=[Depends(require_admin)],
+)
+async def get_audit(
+    ticket_id: UUID,
+    event_type: Optional[list[AuditEvent]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    format: Literal["json", "ndjson"] = "json",
+    db: DbSession = Depends(get_db),
+):
+    """Histórico do ticket em ordem cronológica, paginado por cursor (created_at/id).
+
+    Filtros: `event_type` (repetível), `since`/`until` (intervalo em created_at, fim exclusivo).
+    `format=ndjson` devolve o histórico inteiro (a partir do cursor, se houver) em streaming,
+    um evento por linha, com memória constante; `limit` é ignorado.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    stmt = _audit_query(ticket_id, event_type, since, until, after)
+
+    if format == "ndjson":
+        await run_db(db, _ensure_ticket, ticket_id)
+        return StreamingResponse(_stream_audit(stmt), media_type="application/x-ndjson")
+
+    limit = max(1, min(limit, 1000))
+    return FastJSONResponse(await run_db(db, _get_audit, ticket_id, stmt, limit))
+
+
+def _ensure_ticket(db: Session, ticket_id: UUID) -> None:
+    if db.get(Ticket, ticket_id) is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    # cria pasta do ticket
-    ticket_dir = UPLOAD_ROOT / str(ticket_id)
-    ticket_dir.mkdir(parents=True, exist_ok=True)
 
-    # caminho final do arquivo
-    dest = ticket_dir / file.filename
+def _check_ticket_released(db: Session, ticket_id: UUID) -> None:
+    """`_ensure_ticket` e encerra a transação: a conexão volta ao pool antes do I/O do upload."""
+    try:
+        _ensure_ticket(db, ticket_id)
+    finally:
+        db.rollback()
 
-    # grava em disco (stream)
-    with dest.open("wb") as f:
-        for chunk in iter(lambda: file.file.read(1024 * 1024), b""):
-            f.write(chunk)
 
-    size = dest.stat().st_size
-    mime = file.content_type or "application/octet-stream"
+def _add_attachment(db: Session, ticket_id: UUID, filename: str, mime: str, blob: StoredBlob) -> AttachmentOut:
+    # refcount do blob: cria ou incrementa na mesma transação do anexo
+    db.execute(
+        pg_insert(AttachmentBlob)
+        .values(digest=blob.digest, size=blob.size, path=blob.path, ref_count=1)
+        .on_conflict_do_update(
+            index_elements=[AttachmentBlob.digest],
+            set_={"ref_count": AttachmentBlob.ref_count + 1},
+        )
+    )
 
     att = Attachment(
         ticket_id=ticket_id,
-        filename=file.filename,
+        filename=filename,
         mime=mime,
-        path=str(dest.as_posix()),  # salva relativo; você pode optar por salvar relativo à raiz
-        size=size,
+        path=blob.path,
+        size=blob.size,
+        digest=blob.digest,
     )
     db.add(att)
+    _touch_ticket(db, ticket_id)
 
-    # auditoria (opcional)
     _audit(
         db,
         ticket_id=ticket_id,
-        event=AuditEvent.message_added,  # você pode criar um AuditEvent `attachment_added` se quiser
+        event=AuditEvent.attachment_added,
         actor_id=None,
-        payload={"filename": file.filename, "mime": mime, "size": size},
+        payload={
+            "filename": filename,
+            "mime": mime,
+            "size": blob.size,
+            "digest": blob.digest,
+            "deduplicated": not blob.created,
+        },
     )
 
     db.commit()
-    db.refresh(att)
-    return att
\ No newline at end of file
+    invalidate_tickets([ticket_id])
+    return AttachmentOut.model_validate(att)
+
+
+@router.post("/{ticket_id}/attachments", response_model=AttachmentOut, status_code=201,
+             dependencies=[Depends(require_agent_or_admin)])
+async def upload_attachment(ticket_id: UUID, file: UploadFile = File(...), db: DbSession = Depends(get_db)):
+    """Upload com dedup: o conteúdo é guardado uma vez por sha256, não importa em quantos tickets."""
+    await run_db(db, _check_ticket_released, ticket_id)
+    blob = await store_blob(file.file)
+    mime = file.content_type or "application/octet-stream"
+    return await run_db(db, _add_attachment, ticket_id, file.filename, mime, blob)
+
+
+def _get_attachment(db: Session, ticket_id: UUID, attachment_id: UUID) -> AttachmentOut:
+    att = db.get(Attachment, attachment_id)
+    if not att or att.ticket_id != ticket_id:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    return AttachmentOut.model_validate(att)
+
+
+# anexos de antes do armazenamento por hash: `path` é o caminho do arquivo no disco local
+LEGACY_STORAGE = LocalStorage(Path("."))
+
+
+@router.get("/{ticket_id}/attachments/{attachment_id}", response_class=FileResponse,
+            dependencies=[Depends(require_agent_or_admin)])
+async def download_attachment(ticket_id: UUID, attachment_id: UUID, request: Request, db: DbSession = Depends(get_db)):
+    """Download do anexo em streaming (sendfile quando o servidor suporta), com Range e ETag."""
+    att = await run_db(db, _get_attachment, ticket_id, attachment_id)
+
+    if att.digest:
+        storage, key, extra = get_storage(), blob_key(att.digest), {}
+        etag = f'"{att.digest}"'  # conteúdo imutável (endereçado pelo hash)
+    else:
+        # anexo antigo, gravado por nome no disco local (caminho relativo ao diretório do processo)
+        storage, key = LEGACY_STORAGE, att.path
+        st = await storage.stat(key)
+        if st is None:
+            raise HTTPException(status_code=404, detail="Attachment file missing")
+        # pode ter sido sobrescrito por outro upload com o mesmo nome: o mtime entra no ETag
+        etag = f'"{att.id.hex}-{st.st_size}-{st.st_mtime_ns}"'
+        extra = {"stat_result": st}
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    resp = await storage.response(
+        key,
+        media_type=att.mime,
+        filename=att.filename,
+        headers=headers,
+        range_header=request.headers.get("range"),
+        **extra,
+    )
+    if resp.status_code == 404:
+        raise HTTPException(status_code=404, detail="Attachment file missing")
+    return resp
@@ -1,9 +1,11 @@
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, model_validator
 from enum import Enum
 from uuid import UUID
-from typing import List
+from typing import List, Literal, Optional
 from datetime import datetime
 
+from app.settings import settings
+
 class TicketStatus(str, Enum):
     open = "open"
     in_progress = "in_progress"
@@ -37,11 +39,100 @@ class TicketListOut(BaseModel):
     items: List[TicketOut]
     page: int
     limit: int
-    total: int
+    total: Optional[int]  # None quando total_mode=none
+    total_mode: Literal["exact", "estimate", "none"] = "exact"
+    next_cursor: Optional[str] = None  # passe em ?cursor= para buscar a próxima página
+
+class TicketSearchHit(TicketOut):
+    rank: float
+
+class TicketSearchOut(BaseModel):
+    items: List[TicketSearchHit]
+    limit: int
 
 class TicketAssigneeUpdate(BaseModel):
     assignee_id: UUID | None
 
+class TicketBulkFilter(BaseModel):
+    """Mesmos filtros do GET /tickets."""
+    q: Optional[str] = None
+    status: Optional[TicketStatus] = None
+    assignee_id: Optional[UUID] = None
+    unassigned: bool = False
+    requester_email: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _check(self):
+        if self.unassigned and self.assignee_id is not None:
+            raise ValueError("`unassigned` e `assignee_id` são mutuamente exclusivos")
+        return self
+
+class TicketBulkUpdate(BaseModel):
+    """Alvo: `ids` OU `filter`. Mudanças: `status` e/ou `assignee_id` (enviar `null` desatribui)."""
+    ids: Optional[List[UUID]] = Field(None, max_length=settings.bulk_max_tickets)
+    filter: Optional[TicketBulkFilter] = None
+    status: Optional[TicketStatus] = None
+    assignee_id: Optional[UUID] = None
+
+    @model_validator(mode="after")
+    def _check(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("informe exatamente um entre `ids` e `filter`")
+        if self.status is None and "assignee_id" not in self.model_fields_set:
+            raise ValueError("nada para alterar: informe `status` e/ou `assignee_id`")
+        return self
+
+class TicketBulkResult(BaseModel):
+    updated: int
+    ids: List[UUID]
+
+class TicketLookupRequest(BaseModel):
+    """E-mails de solicitantes (comparados sem diferenciar maiúsculas)."""
+    emails: List[str] = Field(..., min_length=1, max_length=1000)
+    statuses: Optional[List[TicketStatus]] = None  # default: open, in_progress, waiting_customer
+    limit_per_email: int = Field(5, ge=1, le=100)  # tickets mais recentes por e-mail
+
+class TicketLookupMatch(BaseModel):
+    email: str  # normalizado (minúsculas, sem espaços)
+    tickets: List[TicketOut]  # mais recentes primeiro; vazio quando não há ticket
+
+class TicketLookupOut(BaseModel):
+    results: List[TicketLookupMatch]  # um por e-mail distinto, na ordem pedida
+
+class TicketStatusStats(BaseModel):
+    status: TicketStatus
+    count: int
+    avg_age_seconds: Optional[float] = None  # média de (agora - created_at)
+    awaiting_first_response: int
+    avg_first_response_seconds: Optional[float] = None  # média de (first_response_at - created_at)
+
+class TicketAssigneeStats(BaseModel):
+    assignee_id: Optional[UUID]  # None = sem responsável
+    count: int
+    backlog: int  # open + in_progress + waiting_customer
+    by_status: dict[TicketStatus, int]
+    avg_first_response_seconds: Optional[float] = None
+
+class TicketStatsOut(BaseModel):
+    """Painel da fila: lido dos agregados em ticket_stats (custo não cresce com o nº de tickets)."""
+    total: int
+    backlog: int
+    backlog_avg_age_seconds: Optional[float] = None
+    backlog_awaiting_first_response: int
+    avg_first_response_seconds: Optional[float] = None
+    by_status: List[TicketStatusStats]
+    by_assignee: List[TicketAssigneeStats]
+    generated_at: datetime
+
+class TicketImportError(BaseModel):
+    line: int
+    error: str
+
+class TicketImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[TicketImportError]  # só as primeiras 100
+
 class TicketMessageCreate(BaseModel):
     author_id: UUID
     body: str
@@ -60,6 +151,7 @@ class AttachmentOut(BaseModel):
     mime: str
     path: str
     size: int
+    digest: Optional[str] = None  # sha256 do conteúdo (None em anexos antigos)
     created_at: datetime
 
 class TicketDetailOut(BaseModel):
@@ -73,7 +165,8 @@ class TicketDetailOut(BaseModel):
     requester_email: str
     status: TicketStatus
     messages: list[TicketMessageOut]
-    attachments: list[AttachmentOut]    
+    messages_next_cursor: Optional[str] = None  # ?messages_cursor= para a próxima página de mensagens
+    attachments: list[AttachmentOut]
 
 
 class AuditEvent(str, Enum):
@@ -81,6 +174,7 @@ class AuditEvent(str, Enum):
     status_changed = "status_changed"
     assignee_changed = "assignee_changed"
     message_added = "message_added"
+    attachment_added = "attachment_added"
 
 class TicketAuditOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -91,6 +185,11 @@ class TicketAuditOut(BaseModel):
     payload: dict
     created_at: datetime
 
+class TicketAuditPage(BaseModel):
+    items: List[TicketAuditOut]
+    limit: int
+    next_cursor: Optional[str] = None  # passe em ?cursor= para buscar a próxima página
+
 class AttachmentOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: UUID
@@ -98,4 +197,5 @@ class AttachmentOut(BaseModel):
     mime: str
     path: str
     size: int
+    digest: Optional[str] = None  # sha256 do conteúdo (None em anexos antigos)
     created_at: datetime
\ No newline at end of file
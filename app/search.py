@@ -0,0 +1,34 @@
+import re
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models import Ticket
+
+# config 'simple': sem stemming, funciona igual para pt/en (mesma usada na migration/trigger)
+SEARCH_CONFIG = "simple"
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def build_tsquery(q: Optional[str]) -> Optional[ColumnElement]:
+    """Converte o texto livre de `q` em tsquery com prefixo (`termo:*`), todos os termos obrigatórios.
+
+    Retorna None se `q` não tiver nenhum termo pesquisável.
+    """
+    tokens = _TOKEN_RE.findall((q or "").lower())
+    if not tokens:
+        return None
+    expr = " & ".join(f"{tok}:*" for tok in tokens)
+    return func.to_tsquery(SEARCH_CONFIG, expr)
+
+
+def search_filter(tsquery: ColumnElement) -> ColumnElement:
+    """Filtro indexável (GIN em tickets.search_vector)."""
+    return Ticket.search_vector.op("@@")(tsquery)
+
+
+def search_rank(tsquery: ColumnElement) -> ColumnElement:
+    """Relevância: título pesa mais que descrição, que pesa mais que mensagens."""
+    return func.ts_rank_cd(Ticket.search_vector, tsquery)
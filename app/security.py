@@ -1,14 +1,24 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from uuid import UUID
+import hashlib
+import time
 import jwt
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPBearer
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.cache import TTLCache
+from app.db import get_db, run_db, DbSession
+from app.models import User
 from app.settings import settings
 
 auth_scheme = HTTPBearer()  # lê Authorization: Bearer <token>
 
 class TokenData(BaseModel):
+    model_config = ConfigDict(frozen=True)  # instâncias ficam no cache e são compartilhadas
+
     user_id: str
     role: str
     exp: Optional[int] = None  # para o jwt.decode validar expiração
@@ -19,32 +29,67 @@ def create_token(*, user_id: str, role: str) -> str:
     payload = {"user_id": user_id, "role": role, "exp": exp}
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_alg)
 
-def get_current_user(req: Request, creds=Depends(auth_scheme)) -> TokenData:
+_token_cache = TTLCache(maxsize=settings.auth_token_cache_size, ttl=settings.auth_token_cache_seconds)
+_active_cache = TTLCache(maxsize=settings.auth_token_cache_size, ttl=settings.auth_active_cache_seconds)
+
+def _decode_token(token: str) -> TokenData:
+    """jwt.decode com cache dos tokens já verificados (o dashboard repete o mesmo token o tempo todo)."""
+    key = hashlib.sha256(token.encode()).digest()
+    user = _token_cache.get(key)
+    if user is not None:
+        if user.exp is not None and user.exp <= time.time():
+            _token_cache.pop(key)
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        return user
+
+    user = TokenData(**jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_alg]))
+    ttl = settings.auth_token_cache_seconds
+    if user.exp is not None:
+        ttl = min(ttl, user.exp - time.time())
+    _token_cache.set(key, user, ttl)
+    return user
+
+def _load_is_active(db: Session, user_id: str) -> bool:
+    try:
+        uid = UUID(user_id)
+    except ValueError:
+        return False
+    return bool(db.scalar(select(User.is_active).where(User.id == uid)))
+
+async def get_current_user(req: Request, creds=Depends(auth_scheme), db: DbSession = Depends(get_db)) -> TokenData:
     """Lê e valida o JWT do header Authorization: Bearer <token>."""
     token = creds.credentials
     try:
-        data = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_alg])
-        return TokenData(**data)
+        user = _decode_token(token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    if settings.auth_check_active:
+        active = _active_cache.get(user.user_id)
+        if active is None:
+            active = await run_db(db, _load_is_active, user.user_id)
+            _active_cache.set(user.user_id, active)
+        if not active:
+            raise HTTPException(status_code=401, detail="User inactive")
+    return user
+
 # ===== Guards =====
 
-def require_admin(user: TokenData = Depends(get_current_user)) -> TokenData:
+async def require_admin(user: TokenData = Depends(get_current_user)) -> TokenData:
     """Permite apenas admin; admin também é agente implicitamente."""
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Admins only")
     return user
 
-def require_agent(user: TokenData = Depends(get_current_user)) -> TokenData:
+async def require_agent(user: TokenData = Depends(get_current_user)) -> TokenData:
     """Permite agent e admin (admin herda permissão)."""
     if user.role not in ("agent", "admin"):
         raise HTTPException(status_code=403, detail="Agents only")
     return user
 
-def require_agent_or_admin(user: TokenData = Depends(get_current_user)) -> TokenData:
+async def require_agent_or_admin(user: TokenData = Depends(get_current_user)) -> TokenData:
     # igual ao require_agent, deixo explícito pra semântica
     if user.role not in ("agent", "admin"):
         raise HTTPException(status_code=403, detail="Agents or admins only")
@@ -0,0 +1,47 @@
+from typing import Any
+
+import pydantic_core
+from fastapi import Response
+
+from app.settings import settings
+
+# Respostas "quentes" (listagem, detalhe, auditoria) montadas direto das linhas do banco como
+# dicts/tuplas e codificadas sem passar pela validação dos schemas de saída: os dados vêm do
+# próprio banco (já validados na escrita). UUID, datetime e Enum são serializados nativamente.
+# VALIDATE_RESPONSES=true revalida os payloads nos schemas (útil em dev/testes).
+
+_orjson = None
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+        except ImportError as exc:  # pragma: no cover - depende do ambiente
+            raise RuntimeError("JSON_ENCODER=orjson requer o pacote orjson") from exc
+        _orjson = orjson
+    # OPT_UTC_Z: datetimes em UTC saem com "Z", igual ao pydantic
+    return _orjson.dumps(obj, option=_orjson.OPT_UTC_Z)
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON em bytes: orjson (JSON_ENCODER=orjson) ou o encoder em Rust do pydantic-core (default)."""
+    if settings.json_encoder == "orjson":
+        return _orjson_dumps(obj)
+    return pydantic_core.to_json(obj)
+
+
+def validated(model, payload: dict) -> dict:
+    """Com VALIDATE_RESPONSES, confere `payload` contra o schema (erro = bug de montagem)."""
+    if settings.validate_responses:
+        model.model_validate(payload)
+    return payload
+
+
+class FastJSONResponse(Response):
+    """JSONResponse sem jsonable_encoder: `content` já deve ser dict/list de tipos simples."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
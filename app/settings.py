@@ -1,14 +1,91 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     env: str = "local"
     database_url: str
 
+    # modo async: AsyncEngine (asyncpg) + rotas sem threadpool
+    db_async: bool = False
+    async_database_url: Optional[str] = None  # default: DATABASE_URL com driver +asyncpg
+
+    # pool de conexões (vale para o engine sync e o async)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0  # segundos esperando conexão livre antes de erro
+    db_pool_recycle: int = 1800  # segundos; -1 desliga
+    # True: testa a conexão a cada checkout (1 round-trip extra). False: confia no recycle
+    # e descarta a conexão quando der erro de desconexão
+    db_pool_pre_ping: bool = True
+
     model_config = SettingsConfigDict(env_file=".env", env_prefix="", case_sensitive=False)
     
     jwt_secret: str = "dev-secret"
     jwt_alg: str = "HS256"
     jwt_expires_hours: int = 8
+    # cache de tokens já verificados (chave: sha256 do token; nunca além do `exp`)
+    auth_token_cache_seconds: float = 300.0
+    auth_token_cache_size: int = 10000
+    # checa users.is_active (com cache curto): desativado perde acesso em até N segundos
+    auth_check_active: bool = False
+    auth_active_cache_seconds: float = 30.0
+
+    # armazenamento de anexos: "local" (disco, ./uploads) ou "s3" (S3/MinIO; requer boto3)
+    storage_backend: str = "local"
+    s3_bucket: str = "support-desk-attachments"
+    s3_endpoint_url: Optional[str] = None  # ex.: http://localhost:9000 para MinIO
+    s3_region: Optional[str] = None
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
+    s3_part_size_mb: int = 8
+    s3_max_concurrency: int = 8  # partes enviadas em paralelo por upload
+
+    # PATCH /tickets/bulk: máximo de tickets alterados por chamada
+    bulk_max_tickets: int = 5000
+    # POST /tickets/import e scripts/import_tickets.py: tickets por INSERT/commit
+    import_batch_size: int = 2000
+
+    # GET /tickets/feed (SSE)
+    feed_queue_size: int = 1000  # eventos pendentes por cliente antes de derrubá-lo
+    feed_heartbeat_seconds: float = 15.0
+
+    # auditoria: "sync" grava na transação da rota; "queue" enfileira após o commit e um
+    # writer em background grava em lotes (tira o INSERT da latência das rotas)
+    audit_mode: str = "sync"
+    audit_batch_size: int = 500
+    audit_flush_interval_seconds: float = 0.2  # espera máxima para completar um lote
+    audit_queue_size: int = 10000
+    audit_enqueue_timeout_seconds: float = 1.0  # fila cheia: espera isso e depois grava direto
+
+    # ticket_audit particionada por mês (scripts/audit_retention.py)
+    audit_partitions_ahead: int = 3  # meses futuros com partição já criada
+    audit_retention_months: int = 12  # partições mais antigas são exportadas e removidas
+    audit_archive_dir: str = "archive/audit"
+
+    # instrumentação por requisição (ver app/instrumentation.py)
+    server_timing: bool = True  # header Server-Timing com tempo de banco e nº de queries
+    query_count_header: bool = False  # header X-Query-Count (usado por bench/load.py)
+    slow_query_ms: float = 200.0  # loga queries acima disso (fingerprint + forma dos binds); 0 desliga
+    # header `X-Profile: 1` devolve o relatório do pyinstrument no lugar da resposta (requer pyinstrument)
+    profiling_enabled: bool = False
+    profiling_interval_ms: float = 1.0
+
+    # serialização de listagem/detalhe/auditoria (ver app/serialization.py): "pydantic" (pydantic-core)
+    # ou "orjson" (requer o pacote orjson); validate_responses revalida os payloads nos schemas
+    json_encoder: str = "pydantic"
+    validate_responses: bool = False
+
+    # cache de respostas de GET /tickets e GET /tickets/{id}: "none", "memory" (por processo)
+    # ou "redis" (compartilhado; requer o pacote redis). ETag/304 funcionam em qualquer modo
+    response_cache: str = "none"
+    response_cache_url: str = "redis://localhost:6379/0"
+    response_cache_ttl_seconds: float = 30.0
+    response_cache_size: int = 2048
+
+    # cache de contagens do GET /tickets (total_mode=exact)
+    count_cache_ttl_seconds: float = 30.0
+    count_cache_size: int = 1024
 
 
 class Config:
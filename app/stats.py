@@ -0,0 +1,161 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import BigInteger, delete, func, insert, literal, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models import Ticket, ticket_stats
+from app.schemas import TicketAssigneeStats, TicketStatsOut, TicketStatus, TicketStatusStats
+
+# status que ainda exigem ação do time
+BACKLOG_STATUSES = (TicketStatus.open, TicketStatus.in_progress, TicketStatus.waiting_customer)
+
+_SUMS = (
+    func.sum(ticket_stats.c.tickets).label("tickets"),
+    func.sum(ticket_stats.c.created_epoch_sum).label("created_epoch_sum"),
+    func.sum(ticket_stats.c.responded).label("responded"),
+    func.sum(ticket_stats.c.first_response_seconds_sum).label("first_response_seconds_sum"),
+)
+
+
+class _Acc:
+    """Soma parcial de linhas de ticket_stats (por status, por responsável, backlog)."""
+
+    def __init__(self):
+        self.tickets = self.created = self.responded = self.first_response = 0
+
+    def add(self, row) -> None:
+        self.tickets += int(row.tickets)
+        self.created += int(row.created_epoch_sum)
+        self.responded += int(row.responded)
+        self.first_response += int(row.first_response_seconds_sum)
+
+    def merge(self, other: "_Acc") -> None:
+        self.tickets += other.tickets
+        self.created += other.created
+        self.responded += other.responded
+        self.first_response += other.first_response
+
+    def avg_age(self, now: float) -> Optional[float]:
+        return now - self.created / self.tickets if self.tickets else None
+
+    def avg_first_response(self) -> Optional[float]:
+        return self.first_response / self.responded if self.responded else None
+
+
+def ticket_stats_summary(db: Session) -> TicketStatsOut:
+    """Contagens por status/responsável, idade do backlog e tempo de primeira resposta.
+
+    Uma query sobre ticket_stats: o tamanho é (status x responsáveis x shards), não o nº de tickets.
+    """
+    rows = db.execute(
+        select(ticket_stats.c.status, ticket_stats.c.assignee_id, *_SUMS)
+        .group_by(ticket_stats.c.status, ticket_stats.c.assignee_id)
+    ).all()
+    generated_at = datetime.now(timezone.utc)
+    now = generated_at.timestamp()
+
+    total, backlog = _Acc(), _Acc()
+    by_status: dict[TicketStatus, _Acc] = defaultdict(_Acc)
+    by_assignee: dict = defaultdict(lambda: defaultdict(_Acc))
+    for row in rows:
+        if not row.tickets:
+            continue
+        status = TicketStatus(row.status)
+        for acc in (total, by_status[status], by_assignee[row.assignee_id][status]):
+            acc.add(row)
+        if status in BACKLOG_STATUSES:
+            backlog.add(row)
+
+    assignees = []
+    for assignee_id, statuses in by_assignee.items():
+        acc = _Acc()
+        for status_acc in statuses.values():
+            acc.merge(status_acc)
+        assignees.append(TicketAssigneeStats(
+            assignee_id=assignee_id,
+            count=acc.tickets,
+            backlog=sum(statuses[s].tickets for s in BACKLOG_STATUSES if s in statuses),
+            by_status={s: a.tickets for s, a in statuses.items()},
+            avg_first_response_seconds=acc.avg_first_response(),
+        ))
+    assignees.sort(key=lambda a: (-a.backlog, -a.count, str(a.assignee_id)))
+
+    return TicketStatsOut(
+        total=total.tickets,
+        backlog=backlog.tickets,
+        backlog_avg_age_seconds=backlog.avg_age(now),
+        backlog_awaiting_first_response=backlog.tickets - backlog.responded,
+        avg_first_response_seconds=total.avg_first_response(),
+        by_status=[
+            TicketStatusStats(
+                status=s,
+                count=by_status[s].tickets,
+                avg_age_seconds=by_status[s].avg_age(now),
+                awaiting_first_response=by_status[s].tickets - by_status[s].responded,
+                avg_first_response_seconds=by_status[s].avg_first_response(),
+            )
+            for s in TicketStatus
+        ],
+        by_assignee=assignees,
+        generated_at=generated_at,
+    )
+
+
+def compact_ticket_stats(conn: Connection) -> tuple[int, int]:
+    """Junta os shards de cada chave em um só e remove chaves zeradas; devolve (linhas antes, depois).
+
+    Bloqueia ticket_stats (e portanto as escritas em tickets) só durante a troca das linhas.
+    """
+    with conn.begin():
+        conn.execute(text("LOCK TABLE ticket_stats IN EXCLUSIVE MODE"))
+        before = conn.execute(select(func.count()).select_from(ticket_stats)).scalar_one()
+        rows = conn.execute(
+            select(ticket_stats.c.status, ticket_stats.c.assignee_id, *_SUMS)
+            .group_by(ticket_stats.c.status, ticket_stats.c.assignee_id)
+        ).mappings().all()
+        conn.execute(delete(ticket_stats))
+        keep = [
+            {**row, "shard": 0} for row in rows
+            if row["tickets"] or row["created_epoch_sum"] or row["responded"] or row["first_response_seconds_sum"]
+        ]
+        if keep:
+            conn.execute(insert(ticket_stats), keep)
+    return before, len(keep)
+
+
+def rebuild_ticket_stats(conn: Connection) -> int:
+    """Recalcula ticket_stats do zero a partir de tickets (varredura completa; só para corrigir desvios).
+
+    Segura um lock SHARE em tickets: leituras seguem, escritas esperam até o fim.
+    """
+    created = func.extract("epoch", Ticket.created_at).cast(BigInteger)
+    first_response = func.extract("epoch", Ticket.first_response_at - Ticket.created_at).cast(BigInteger)
+    with conn.begin():
+        conn.execute(text("LOCK TABLE tickets IN SHARE MODE"))
+        conn.execute(delete(ticket_stats))
+        conn.execute(insert(ticket_stats).from_select(
+            ["status", "assignee_id", "shard", "tickets", "created_epoch_sum", "responded",
+             "first_response_seconds_sum"],
+            select(
+                Ticket.status, Ticket.assignee_id, literal(0),
+                func.count(), func.sum(created), func.count(Ticket.first_response_at),
+                func.coalesce(func.sum(first_response), 0),
+            ).group_by(Ticket.status, Ticket.assignee_id),
+        ))
+        return conn.execute(select(func.count()).select_from(ticket_stats)).scalar_one()
+
+
+def ticket_stats_drift(conn: Connection) -> list[tuple[TicketStatus, int, int]]:
+    """(status, agregado, contagem real) onde diferem. Varre tickets: uso em manutenção."""
+    aggregated = dict(conn.execute(
+        select(ticket_stats.c.status, func.sum(ticket_stats.c.tickets)).group_by(ticket_stats.c.status)
+    ).all())
+    actual = dict(conn.execute(select(Ticket.status, func.count()).group_by(Ticket.status)).all())
+    return [
+        (TicketStatus(s), int(aggregated.get(s) or 0), int(actual.get(s) or 0))
+        for s in {*aggregated, *actual}
+        if int(aggregated.get(s) or 0) != int(actual.get(s) or 0)
+    ]
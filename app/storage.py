@@ -0,0 +1,269 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+from urllib.parse import quote
+
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.settings import settings
+
+UPLOAD_ROOT = Path("uploads")
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StoredBlob:
+    digest: str  # sha256 hex do conteúdo
+    size: int
+    path: str  # chave do blob no backend (ex.: blobs/ab/cd/abcd...)
+    created: bool  # False quando o conteúdo já existia (dedup, nada foi gravado)
+
+
+def blob_key(digest: str) -> str:
+    """blobs/ab/cd/abcd...: dois níveis para não lotar um diretório (ou prefixo) só."""
+    return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def _hash_stream(src: BinaryIO) -> tuple[str, int]:
+    h = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+        h.update(chunk)
+        size += len(chunk)
+    src.seek(0)
+    return h.hexdigest(), size
+
+
+class StorageBackend(ABC):
+    """Onde ficam os blobs de anexos. Métodos async; I/O bloqueante vai para o threadpool."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def put(self, key: str, src: BinaryIO, size: int) -> None: ...
+
+    @abstractmethod
+    async def response(
+        self, key: str, *, media_type: str, filename: str, headers: dict, range_header: Optional[str]
+    ) -> Response:
+        """Resposta HTTP de download do blob (streaming, com suporte a Range)."""
+
+    async def store(self, src: BinaryIO) -> StoredBlob:
+        """Grava `src` endereçado pelo sha256, salvo se o blob já existe.
+
+        Padrão: calcula o hash antes (a chave depende dele) e só envia se o HEAD não achar o blob,
+        o que evita reenviar pela rede um conteúdo repetido.
+        """
+        digest, size = await run_in_threadpool(_hash_stream, src)
+        key = blob_key(digest)
+        if await self.exists(key):
+            return StoredBlob(digest=digest, size=size, path=key, created=False)
+        await self.put(key, src, size)
+        return StoredBlob(digest=digest, size=size, path=key, created=True)
+
+
+class LocalStorage(StorageBackend):
+    """Disco local (ou volume compartilhado) sob `root`."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self.path_for(key).exists)
+
+    def _write(self, src: BinaryIO, dest: Path) -> None:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        # grava num temporário no mesmo diretório e renomeia: leitores nunca veem arquivo pela metade
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(src, f, CHUNK_SIZE)
+            os.replace(tmp, dest)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    async def put(self, key: str, src: BinaryIO, size: int) -> None:
+        await run_in_threadpool(self._write, src, self.path_for(key))
+
+    def _store(self, src: BinaryIO) -> StoredBlob:
+        # uma passada só: calcula o sha256 enquanto copia para um temporário e depois renomeia
+        staging = self.root / "blobs"
+        staging.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=staging, prefix=".tmp-")
+        h = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    h.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            digest = h.hexdigest()
+            key = blob_key(digest)
+            dest = self.path_for(key)
+            created = not dest.exists()
+            if created:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, dest)
+            else:
+                Path(tmp).unlink()
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return StoredBlob(digest=digest, size=size, path=key, created=created)
+
+    async def store(self, src: BinaryIO) -> StoredBlob:
+        return await run_in_threadpool(self._store, src)
+
+    def _stat(self, key: str) -> Optional[os.stat_result]:
+        try:
+            return self.path_for(key).stat()
+        except FileNotFoundError:
+            return None
+
+    async def stat(self, key: str) -> Optional[os.stat_result]:
+        """`os.stat` do blob, ou None se ele não existe."""
+        return await run_in_threadpool(self._stat, key)
+
+    async def response(self, key, *, media_type, filename, headers, range_header, stat_result=None):
+        path = self.path_for(key)
+        st = stat_result or await self.stat(key)
+        if st is None:
+            return Response(status_code=404)
+        # FileResponse trata Range/If-Range (206) e usa http.response.pathsend quando disponível
+        return FileResponse(path, stat_result=st, media_type=media_type, filename=filename, headers=headers)
+
+
+class S3Storage(StorageBackend):
+    """Object store compatível com S3 (AWS, MinIO...). Upload multipart com partes em paralelo.
+
+    Requer `boto3` (dependência opcional, só importada quando este backend é usado).
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        part_size: int = 8 * 1024 * 1024,
+        max_concurrency: int = 8,
+    ):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError as exc:  # pragma: no cover - depende do ambiente
+            raise RuntimeError("STORAGE_BACKEND=s3 requer o pacote boto3") from exc
+
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            # path-style: funciona com MinIO/stand-ins locais sem DNS por bucket
+            config=Config(s3={"addressing_style": "path"}, max_pool_connections=max_concurrency * 2),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=max_concurrency,
+            use_threads=True,
+        )
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    async def exists(self, key: str) -> bool:
+        return await run_in_threadpool(self._exists, key)
+
+    async def put(self, key: str, src: BinaryIO, size: int) -> None:
+        # upload_fileobj divide em partes de part_size e sobe até max_concurrency partes em paralelo
+        await run_in_threadpool(
+            self.client.upload_fileobj, src, self.bucket, key, Config=self.transfer_config
+        )
+
+    async def response(self, key, *, media_type, filename, headers, range_header):
+        from botocore.exceptions import ClientError
+
+        kwargs = {"Bucket": self.bucket, "Key": key}
+        # S3 aceita um único intervalo; múltiplos intervalos viram download completo
+        if range_header and range_header.startswith("bytes=") and "," not in range_header:
+            kwargs["Range"] = range_header
+        try:
+            obj = await run_in_threadpool(self.client.get_object, **kwargs)
+        except ClientError as exc:
+            code = exc.response.get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey"):
+                return Response(status_code=404)
+            if code == "InvalidRange":
+                return Response(status_code=416, headers={"Content-Range": "bytes */*"})
+            raise
+
+        out_headers = {
+            **headers,
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(obj["ContentLength"]),
+            "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+        }
+        status = 200
+        if obj.get("ContentRange"):
+            status = 206
+            out_headers["Content-Range"] = obj["ContentRange"]
+        # StreamingResponse itera o iterador síncrono no threadpool
+        return StreamingResponse(
+            obj["Body"].iter_chunks(CHUNK_SIZE), status_code=status, media_type=media_type, headers=out_headers
+        )
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Backend configurado em `settings.storage_backend` (instanciado uma vez por processo)."""
+    global _storage
+    if _storage is None:
+        if settings.storage_backend == "s3":
+            _storage = S3Storage(
+                settings.s3_bucket,
+                endpoint_url=settings.s3_endpoint_url,
+                region=settings.s3_region,
+                access_key_id=settings.s3_access_key_id,
+                secret_access_key=settings.s3_secret_access_key,
+                part_size=settings.s3_part_size_mb * 1024 * 1024,
+                max_concurrency=settings.s3_max_concurrency,
+            )
+        else:
+            _storage = LocalStorage(UPLOAD_ROOT)
+    return _storage
+
+
+async def store_blob(src: BinaryIO) -> StoredBlob:
+    """Guarda o conteúdo de `src` endereçado pelo sha256; se o blob já existe, não grava nada.
+
+    Todo o I/O (disco ou rede) roda fora do event loop.
+    """
+    return await get_storage().store(src)
@@ -0,0 +1,171 @@
+"""Gera um dataset sintético (usuários, tickets, mensagens, auditoria) para benchmarks.
+
+Usa os modelos de app/models.py e INSERTs multi-row em lotes (um commit por lote).
+Determinístico para a mesma `--seed`.
+
+Uso:
+    python -m bench.dataset --tickets 100000
+    python -m bench.dataset --tickets 2000000 --messages-per-ticket 4 --days 365 --batch 10000
+"""
+import argparse
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.audit_retention import ensure_partitions_between
+from app.db import SessionLocal, engine
+from app.models import (
+    AuditEvent, Role, Ticket, TicketAudit, TicketMessage, TicketStatus, User, allocate_ticket_numbers,
+)
+
+WORDS = (
+    "login senha erro acesso fatura boleto pagamento cobrança entrega pedido atraso produto "
+    "troca devolução cadastro email app site lento travando bloqueado cartão pix nota fiscal "
+    "suporte urgente cliente conta plano upgrade cancelamento reembolso integração api relatório"
+).split()
+FIRST_NAMES = "Ana Bruno Carla Diego Elisa Fábio Gabriela Heitor Isabela João Larissa Marcos Nina Otávio Paula Rafael".split()
+LAST_NAMES = "Silva Souza Costa Oliveira Pereira Lima Carvalho Almeida Ribeiro Gomes Martins Rocha".split()
+# distribuição típica de um desk em operação: a maioria já resolvida/fechada
+STATUS_WEIGHTS = {
+    TicketStatus.open: 20,
+    TicketStatus.in_progress: 15,
+    TicketStatus.waiting_customer: 10,
+    TicketStatus.resolved: 30,
+    TicketStatus.closed: 25,
+}
+BENCH_EMAIL_DOMAIN = "bench.example.com"
+
+
+def _sentence(rng: random.Random, lo: int, hi: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi))).capitalize()
+
+
+def ensure_users(db, count: int) -> tuple[list[uuid.UUID], uuid.UUID]:
+    """Agentes `agent-N@bench.example.com` + um admin; devolve (ids dos agentes, id do admin)."""
+    rows = [dict(id=uuid.uuid4(), name="Bench Admin", email=f"admin@{BENCH_EMAIL_DOMAIN}", role=Role.admin)]
+    rows += [
+        dict(id=uuid.uuid4(), name=f"Bench Agent {i}", email=f"agent-{i}@{BENCH_EMAIL_DOMAIN}", role=Role.agent)
+        for i in range(count)
+    ]
+    db.execute(pg_insert(User).values(rows).on_conflict_do_nothing(index_elements=[User.email]))
+    db.commit()
+    users = db.execute(
+        select(User.id, User.role).where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+    ).all()
+    agents = [u.id for u in users if u.role == Role.agent]
+    admin = next(u.id for u in users if u.role == Role.admin)
+    return agents, admin
+
+
+def build_batch(
+    rng: random.Random, numbers: list[int], agents: list, admin, now: datetime, args
+) -> tuple[list, list, list]:
+    tickets, messages, audits = [], [], []
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    for number in numbers:
+        ticket_id = uuid.uuid4()
+        created = now - timedelta(seconds=rng.uniform(0, args.days * 86400))
+        status = rng.choices(statuses, weights)[0]
+        assignee = rng.choice(agents) if agents and rng.random() > args.unassigned else None
+        requester = rng.randrange(args.requesters)
+        title = _sentence(rng, 3, 8)
+        n_messages = rng.randint(0, 2 * args.messages_per_ticket)
+        last = created
+
+        audits.append(dict(
+            ticket_id=ticket_id, event_type=AuditEvent.ticket_created, actor_id=None, created_at=created,
+            payload={"number": number, "title": title, "source": "bench"},
+        ))
+        for _ in range(n_messages):
+            last = min(last + timedelta(seconds=rng.uniform(60, 86400)), now)
+            author = rng.choice(agents) if agents else admin  # --users 0: o admin responde
+            body = _sentence(rng, 5, 60)
+            messages.append(dict(
+                id=uuid.uuid4(), ticket_id=ticket_id, author_id=author, body=body, created_at=last,
+            ))
+            audits.append(dict(
+                ticket_id=ticket_id, event_type=AuditEvent.message_added, actor_id=author, created_at=last,
+                payload={"body_len": len(body)},
+            ))
+        if assignee is not None:
+            audits.append(dict(
+                ticket_id=ticket_id, event_type=AuditEvent.assignee_changed, actor_id=assignee,
+                created_at=min(created + timedelta(minutes=5), now), payload={"from": None, "to": str(assignee)},
+            ))
+        if status != TicketStatus.open:
+            last = min(last + timedelta(seconds=rng.uniform(60, 3600)), now)
+            audits.append(dict(
+                ticket_id=ticket_id, event_type=AuditEvent.status_changed, actor_id=None, created_at=last,
+                payload={"from": str(TicketStatus.open), "to": str(status)},
+            ))
+
+        tickets.append(dict(
+            id=ticket_id,
+            number=number,
+            title=title,
+            description=_sentence(rng, 10, 120),
+            requester_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            requester_email=f"cliente{requester}@example.com",
+            status=status,
+            assignee_id=assignee,
+            created_at=created,
+            updated_at=last,
+        ))
+    return tickets, messages, audits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dataset sintético para benchmarks")
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=50, help="agentes (além de 1 admin)")
+    parser.add_argument("--messages-per-ticket", type=int, default=3, help="média (0..2x por ticket)")
+    parser.add_argument("--requesters", type=int, default=20_000, help="e-mails de solicitantes distintos")
+    parser.add_argument("--unassigned", type=float, default=0.2, help="fração de tickets sem responsável")
+    parser.add_argument("--days", type=int, default=180, help="janela de created_at (dias para trás)")
+    parser.add_argument("--batch", type=int, default=5000, help="tickets por lote/commit")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+
+    # auditoria gerada no passado precisa das partições dos meses correspondentes
+    with engine.begin() as conn:
+        ensure_partitions_between(conn, (now - timedelta(days=args.days)).date(), now.date())
+
+    db = SessionLocal()
+    start = time.perf_counter()
+    inserted = n_messages = n_audits = 0
+    try:
+        agents, admin = ensure_users(db, args.users)
+        while inserted < args.tickets:
+            n = min(args.batch, args.tickets - inserted)
+            numbers = allocate_ticket_numbers(db, n)
+            tickets, messages, audits = build_batch(rng, numbers, agents, admin, now, args)
+            db.execute(insert(Ticket), tickets)
+            # cada mensagem dispara o trigger de busca (UPDATE no ticket): é a parte mais lenta
+            if messages:
+                db.execute(insert(TicketMessage), messages)
+            db.execute(insert(TicketAudit), audits)
+            db.commit()
+            inserted += n
+            n_messages += len(messages)
+            n_audits += len(audits)
+            rate = inserted / (time.perf_counter() - start)
+            print(f"\r{inserted}/{args.tickets} tickets ({rate:.0f}/s)", end="", file=sys.stderr)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\nTickets: {inserted}  Mensagens: {n_messages}  Auditoria: {n_audits}  ({elapsed:.0f}s)")
+    print("Rode ANALYZE (ou espere o autovacuum) antes de medir: `psql -c 'ANALYZE'`")
+
+
+if __name__ == "__main__":
+    main()
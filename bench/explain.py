@@ -0,0 +1,114 @@
+"""Confere, via EXPLAIN, que as queries da listagem usam os índices esperados (e não fazem Sort).
+
+Monta os mesmos SELECTs da rota (`_build_filters` + `_list_statement`) para cada formato de filtro
+e procura o índice no plano. Por padrão desliga seq scan/sort na sessão (`enable_seqscan`,
+`enable_sort`): verifica que o índice *serve* à query mesmo num banco pequeno. Com `--real-costs`
+usa o planner sem ajustes (rode depois de `bench.dataset` + ANALYZE para ver o plano real).
+
+Uso:
+    python -m bench.explain
+    python -m bench.explain --real-costs --verbose
+"""
+import argparse
+import json
+import sys
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.engine import Connection
+
+from app.db import engine
+from app.models import TicketMessage
+from app.routes.tickets import _build_filters, _list_statement, _lookup_statement
+from app.schemas import TicketStatus
+from app.stats import BACKLOG_STATUSES
+
+SOME_ID = uuid.UUID(int=1)
+SOME_CURSOR = (datetime(2026, 1, 1, tzinfo=timezone.utc), SOME_ID)
+
+
+def _list(status=None, assignee_id=None, unassigned=False, requester_email=None, after=None):
+    filters = _build_filters(None, status, assignee_id, unassigned, requester_email)
+    return _list_statement(filters, 1, 20, after)
+
+
+# (nome, statement, índice esperado[, Sort permitido])
+CASES = [
+    ("list", _list(), "ix_tickets_created_at_id"),
+    ("list cursor", _list(after=SOME_CURSOR), "ix_tickets_created_at_id"),
+    ("status", _list(status=TicketStatus.in_progress), "ix_tickets_status_created_at_id"),
+    ("status cursor", _list(status=TicketStatus.resolved, after=SOME_CURSOR), "ix_tickets_status_created_at_id"),
+    ("assignee", _list(assignee_id=SOME_ID), "ix_tickets_assignee_id_created_at_id"),
+    ("assignee cursor", _list(assignee_id=SOME_ID, after=SOME_CURSOR), "ix_tickets_assignee_id_created_at_id"),
+    ("unassigned", _list(unassigned=True), "ix_tickets_assignee_id_created_at_id"),
+    ("triage queue", _list(status=TicketStatus.open, unassigned=True), "ix_tickets_triage_queue"),
+    ("requester", _list(requester_email="Cliente@Example.com"), "ix_tickets_requester_email_lc_created_at_id"),
+    # = ANY em vários e-mails: a ordem por e-mail pode exigir Sort (pequeno: só as linhas achadas)
+    (
+        "requester lookup",
+        _lookup_statement([f"cliente{i}@example.com" for i in range(100)], list(BACKLOG_STATUSES), 5),
+        "ix_tickets_requester_email_lc_created_at_id",
+        True,
+    ),
+    (
+        "detail messages",
+        select(TicketMessage.id)
+        .where(TicketMessage.ticket_id == SOME_ID)
+        .where(tuple_(TicketMessage.created_at, TicketMessage.id) > SOME_CURSOR)
+        .order_by(TicketMessage.created_at.asc(), TicketMessage.id.asc())
+        .limit(50),
+        "ix_ticket_messages_ticket_id_created_at_id",
+    ),
+]
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _walk(child)
+
+
+def explain(conn: Connection, stmt) -> dict:
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    return conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()[0]["Plan"]
+
+
+def check(conn: Connection, stmt, expected: str, allow_sort: bool = False) -> tuple[bool, str]:
+    """(ok, resumo do plano): ok quando `expected` aparece no plano e (salvo `allow_sort`) não há Sort."""
+    plan = explain(conn, stmt)
+    nodes = list(_walk(plan))
+    indexes = {n["Index Name"] for n in nodes if "Index Name" in n}
+    sorted_ = any(n["Node Type"] in ("Sort", "Incremental Sort") for n in nodes)
+    summary = " > ".join(
+        n["Node Type"] + (f" ({n['Index Name']})" if "Index Name" in n else "") for n in nodes
+    )
+    return expected in indexes and (allow_sort or not sorted_), summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica o uso de índices nas queries da listagem")
+    parser.add_argument("--real-costs", action="store_true", help="não desliga seq scan/sort no planner")
+    parser.add_argument("--verbose", action="store_true", help="imprime o plano JSON de cada caso")
+    args = parser.parse_args()
+
+    failures = 0
+    with engine.connect() as conn:
+        if not args.real_costs:
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+            conn.execute(text("SET LOCAL enable_sort = off"))
+        for name, stmt, expected, *allow_sort in CASES:
+            ok, summary = check(conn, stmt, expected, *allow_sort)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<16} espera {expected}: {summary}")
+            if args.verbose:
+                print(json.dumps(explain(conn, stmt), indent=2))
+        conn.rollback()
+
+    if failures:
+        print(f"{failures} caso(s) sem o índice esperado", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
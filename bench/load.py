@@ -0,0 +1,304 @@
+"""Gerador de carga concorrente para a API, com relatório de latência e comparação com baseline.
+
+Mistura de operações (pesos configuráveis): list (GET /tickets), get (GET /tickets/{id}),
+create (POST /tickets), message (POST /tickets/{id}/messages), upload (POST /tickets/{id}/attachments).
+Queries por requisição vêm do header X-Query-Count (suba a API com QUERY_COUNT_HEADER=true).
+
+Uso:
+    python -m bench.load --duration 60 --concurrency 32
+    python -m bench.load --mix list=70,get=30 --save bench/baselines/main.json
+    python -m bench.load --compare bench/baselines/main.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+DEFAULT_MIX = "list=40,get=30,create=10,message=15,upload=5"
+STATUSES = ("open", "in_progress", "waiting_customer", "resolved", "closed")
+SEARCH_TERMS = ("login", "fatura", "entrega", "senha", "pix", "reembolso")
+TICKET_OPS = frozenset({"get", "message", "upload"})  # precisam de um ticket existente
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)  # segundos
+    queries: list[int] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Percentil por nearest-rank (valores já ordenados)."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(stats: dict[str, EndpointStats], elapsed: float) -> dict:
+    out = {}
+    for name, s in sorted(stats.items()):
+        lat = sorted(s.latencies)
+        out[name] = {
+            "requests": len(lat),
+            "errors": s.errors,
+            "rps": round(len(lat) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(lat, 50) * 1000, 2),
+            "p95_ms": round(percentile(lat, 95) * 1000, 2),
+            "p99_ms": round(percentile(lat, 99) * 1000, 2),
+            "max_ms": round(lat[-1] * 1000, 2) if lat else 0.0,
+            "queries_per_request": round(sum(s.queries) / len(s.queries), 2) if s.queries else None,
+            "statuses": {str(k): v for k, v in sorted(s.statuses.items())},
+        }
+    total = sum(len(s.latencies) for s in stats.values())
+    out["_total"] = {
+        "requests": total,
+        "errors": sum(s.errors for s in stats.values()),
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+    }
+    return out
+
+
+def print_report(summary: dict) -> None:
+    header = f"{'endpoint':<10} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q/req':>6}"
+    print(header)
+    print("-" * len(header))
+    for name, s in summary.items():
+        if name.startswith("_"):
+            continue
+        qpr = "-" if s["queries_per_request"] is None else f"{s['queries_per_request']:.1f}"
+        print(
+            f"{name:<10} {s['requests']:>7} {s['errors']:>5} {s['rps']:>8.1f} "
+            f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f} {qpr:>6}"
+        )
+    t = summary["_total"]
+    print(f"{'total':<10} {t['requests']:>7} {t['errors']:>5} {t['rps']:>8.1f}")
+
+
+def compare(summary: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressões: p95 ou q/req acima de (1+threshold) x baseline, ou rps abaixo de (1-threshold) x."""
+    regressions = []
+    for name, cur in summary.items():
+        base = baseline.get("endpoints", {}).get(name)
+        if name.startswith("_") or not base or not cur["requests"]:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f} -> {cur['p95_ms']:.1f} ms")
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {cur['rps']:.1f}")
+        bq, cq = base.get("queries_per_request"), cur.get("queries_per_request")
+        if bq is not None and cq is not None and cq > bq * (1 + threshold):
+            regressions.append(f"{name}: queries/req {bq:.1f} -> {cq:.1f}")
+    return regressions
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+class LoadRun:
+    def __init__(self, client: httpx.AsyncClient, args, user_id: str):
+        self.client = client
+        self.args = args
+        self.user_id = user_id
+        self.rng = random.Random(args.seed)
+        self.ticket_ids: list[str] = []
+        self.stats: dict[str, EndpointStats] = {}
+        names, weights = [], []
+        for part in args.mix.split(","):
+            name, _, weight = part.partition("=")
+            names.append(name.strip())
+            weights.append(float(weight))
+        self.ops, self.weights = names, weights
+        # enquanto não há ticket (banco vazio), sorteia só entre as operações que não precisam de um
+        self.ticketless = [(n, w) for n, w in zip(names, weights) if n not in TICKET_OPS]
+
+    async def sample_ticket_ids(self) -> None:
+        """IDs existentes para get/message/upload (percorre a listagem por cursor)."""
+        cursor = None
+        while len(self.ticket_ids) < self.args.sample:
+            params = {"limit": 100, "total_mode": "none"}
+            if cursor:
+                params["cursor"] = cursor
+            r = await self.client.get("/tickets", params=params)
+            r.raise_for_status()
+            data = r.json()
+            self.ticket_ids += [t["id"] for t in data["items"]]
+            cursor = data.get("next_cursor")
+            if not cursor:
+                break
+
+    async def _call(self, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        s = self.stats.setdefault(name, EndpointStats())
+        start = time.perf_counter()
+        try:
+            r = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            s.errors += 1
+            return None
+        s.latencies.append(time.perf_counter() - start)
+        s.statuses[r.status_code] = s.statuses.get(r.status_code, 0) + 1
+        if r.status_code >= 400:
+            s.errors += 1
+        if "x-query-count" in r.headers:
+            s.queries.append(int(r.headers["x-query-count"]))
+        return r
+
+    async def one(self) -> None:
+        if self.ticket_ids:
+            op = self.rng.choices(self.ops, self.weights)[0]
+            ticket_id = self.rng.choice(self.ticket_ids)
+        else:
+            op = self.rng.choices(*zip(*self.ticketless))[0]
+            ticket_id = None
+        if op == "list":
+            params = {"limit": 20}
+            roll = self.rng.random()
+            if roll < 0.4:
+                params["status"] = self.rng.choice(STATUSES)
+            elif roll < 0.55:
+                params["q"] = self.rng.choice(SEARCH_TERMS)
+            await self._call("list", "GET", "/tickets", params=params)
+        elif op == "get":
+            await self._call("get", "GET", f"/tickets/{ticket_id}")
+        elif op == "create":
+            n = self.rng.randrange(1_000_000)
+            r = await self._call("create", "POST", "/tickets", json={
+                "title": f"Bench ticket {n}",
+                "description": "Gerado pelo bench.load",
+                "requester_name": "Bench",
+                "requester_email": f"bench{n % 1000}@example.com",
+            })
+            if r is not None and r.status_code == 201:
+                self.ticket_ids.append(r.json()["id"])
+        elif op == "message":
+            await self._call("message", "POST", f"/tickets/{ticket_id}/messages", json={
+                "author_id": self.user_id, "body": "Mensagem de benchmark " * self.rng.randint(1, 20),
+            })
+        elif op == "upload":
+            # conteúdo aleatório: mede a gravação de verdade (sem dedup)
+            content = os.urandom(self.args.upload_size)
+            await self._call("upload", "POST", f"/tickets/{ticket_id}/attachments",
+                             files={"file": ("bench.bin", content, "application/octet-stream")})
+
+    async def worker(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            await self.one()
+
+    async def run(self) -> float:
+        deadline = time.perf_counter() + self.args.warmup
+        await asyncio.gather(*(self.worker(deadline) for _ in range(self.args.concurrency)))
+        self.stats.clear()  # aquecimento (pool, caches, JIT do planner) não entra no resultado
+        start = time.perf_counter()
+        deadline = start + self.args.duration
+        await asyncio.gather(*(self.worker(deadline) for _ in range(self.args.concurrency)))
+        return time.perf_counter() - start
+
+
+def _token_from_db() -> tuple[str, str]:
+    """Token de admin a partir do usuário criado por bench.dataset (precisa de DATABASE_URL)."""
+    from sqlalchemy import select
+
+    from app.db import SessionLocal
+    from app.models import Role, User
+    from app.security import create_token
+    from bench.dataset import BENCH_EMAIL_DOMAIN
+
+    with SessionLocal() as db:
+        admin = db.execute(
+            select(User.id).where(User.email == f"admin@{BENCH_EMAIL_DOMAIN}", User.role == Role.admin)
+        ).scalar_one_or_none()
+    if admin is None:
+        sys.exit("usuário admin do benchmark não encontrado: rode `python -m bench.dataset` antes")
+    return create_token(user_id=str(admin), role=Role.admin.value), str(admin)
+
+
+async def amain(args) -> int:
+    token, user_id = (args.token, None) if args.token else _token_from_db()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=limits,
+        timeout=args.timeout,
+    ) as client:
+        if user_id is None:
+            me = await client.get("/me")
+            me.raise_for_status()
+            user_id = me.json()["user_id"]
+        run = LoadRun(client, args, user_id)
+        await run.sample_ticket_ids()
+        if not run.ticket_ids and not run.ticketless:
+            sys.exit("nenhum ticket para get/message/upload: rode `python -m bench.dataset` ou inclua create no --mix")
+        print(f"{len(run.ticket_ids)} tickets amostrados; {args.concurrency} clientes por {args.duration}s",
+              file=sys.stderr)
+        elapsed = await run.run()
+
+    summary = summarize(run.stats, elapsed)
+    print_report(summary)
+
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "meta": {
+                "git_rev": _git_rev(),
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+                "base_url": args.base_url,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "mix": args.mix,
+            },
+            "endpoints": summary,
+        }, indent=2))
+        print(f"baseline salvo em {path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(summary, baseline, args.threshold)
+        rev = baseline.get("meta", {}).get("git_rev")
+        if regressions:
+            print(f"\nREGRESSÕES vs {args.compare} ({rev}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nsem regressões vs {args.compare} ({rev}, tolerância {args.threshold:.0%})")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga concorrente + p50/p95/p99 por endpoint")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", default=os.environ.get("BENCH_TOKEN"), help="default: admin do bench.dataset")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos medidos")
+    parser.add_argument("--warmup", type=float, default=5.0, help="segundos descartados no início")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"pesos por operação (default: {DEFAULT_MIX})")
+    parser.add_argument("--sample", type=int, default=2000, help="IDs de tickets existentes a usar")
+    parser.add_argument("--upload-size", type=int, default=64 * 1024, help="bytes por upload")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="grava o resultado como baseline (JSON)")
+    parser.add_argument("--compare", help="baseline para comparar; sai com código 1 se houver regressão")
+    parser.add_argument("--threshold", type=float, default=0.10, help="tolerância relativa na comparação")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(amain(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Manutenção das partições de ticket_audit (rodar diariamente, ex.: cron).
+
+Cria as partições dos próximos meses e arquiva as que saíram da janela de retenção
+(DETACH + export CSV gzip + DROP).
+
+Uso:
+    python -m scripts.audit_retention
+    python -m scripts.audit_retention --retention-months 24 --out-dir /mnt/archive/audit
+    python -m scripts.audit_retention --dry-run
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from app.audit_retention import archive_partitions, default_partition_rows, ensure_partitions
+from app.db import engine
+from app.settings import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cria/arquiva partições mensais de ticket_audit")
+    parser.add_argument("--months-ahead", type=int, default=settings.audit_partitions_ahead)
+    parser.add_argument("--retention-months", type=int, default=settings.audit_retention_months)
+    parser.add_argument("--out-dir", type=Path, default=Path(settings.audit_archive_dir))
+    parser.add_argument("--keep-tables", action="store_true", help="desanexa e exporta, mas não remove a tabela")
+    parser.add_argument("--dry-run", action="store_true", help="só lista o que seria arquivado")
+    args = parser.parse_args()
+
+    if not args.dry_run:
+        with engine.begin() as conn:
+            for name in ensure_partitions(conn, args.months_ahead):
+                print(f"criada {name}")
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        archived = archive_partitions(
+            conn, args.retention_months, args.out_dir, drop=not args.keep_tables, dry_run=args.dry_run
+        )
+        for part in archived:
+            if args.dry_run:
+                print(f"arquivaria {part.name} -> {part.path}")
+            else:
+                print(f"arquivada {part.name}: {part.rows} linhas -> {part.path}")
+
+        stray = default_partition_rows(conn)
+        if stray:
+            print(f"atenção: {stray} linhas em ticket_audit_default (faltou partição)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Importa tickets em massa de um arquivo NDJSON ou CSV.
+
+Uso:
+    python -m scripts.import_tickets tickets.ndjson
+    python -m scripts.import_tickets legado.csv --batch-size 5000
+    cat dump.ndjson | python -m scripts.import_tickets - --format ndjson
+"""
+import argparse
+import sys
+import time
+
+from app.db import SessionLocal
+from app.ingest import TicketImport, insert_batch
+from app.models import TicketStatus
+from app.response_cache import invalidate_tickets
+from app.settings import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa tickets (NDJSON/CSV) em lotes")
+    parser.add_argument("path", help="arquivo de entrada, ou - para stdin")
+    parser.add_argument("--format", choices=("ndjson", "csv"), help="default: pela extensão do arquivo")
+    parser.add_argument("--batch-size", type=int, default=settings.import_batch_size)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    src = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+
+    job = TicketImport(fmt, args.batch_size)
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+            for batch in job.feed(chunk):
+                job.result.inserted += insert_batch(db, batch)
+                print(f"\r{job.result.inserted} inseridos...", end="", file=sys.stderr)
+        for batch in job.finish():
+            job.result.inserted += insert_batch(db, batch)
+    finally:
+        db.close()
+        if src is not sys.stdin.buffer:
+            src.close()
+        # o cache de contagens é por processo da API: lá as contagens convergem em COUNT_CACHE_TTL_SECONDS
+        invalidate_tickets(statuses=[TicketStatus.open])  # só tem efeito com RESPONSE_CACHE=redis
+
+    elapsed = time.perf_counter() - start
+    rate = job.result.inserted / elapsed if elapsed else 0
+    print(f"\nInseridos: {job.result.inserted}  Falhas: {job.result.failed}  ({rate:.0f} tickets/s)")
+    for err in job.result.errors:
+        print(f"  linha {err.line}: {err.error}")
+
+
+if __name__ == "__main__":
+    main()
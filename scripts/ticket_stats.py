@@ -0,0 +1,41 @@
+"""Manutenção de ticket_stats (agregados do GET /tickets/stats).
+
+Os triggers mantêm os agregados em dia; este script só compacta os shards (rodar de vez em
+quando, ex.: cron diário) ou recalcula tudo a partir de tickets se houver desvio.
+
+Uso:
+    python -m scripts.ticket_stats              # compacta
+    python -m scripts.ticket_stats --check      # compara com COUNT(*) por status (varre tickets)
+    python -m scripts.ticket_stats --rebuild    # recalcula do zero (bloqueia escritas durante a carga)
+"""
+import argparse
+import sys
+
+from app.db import engine
+from app.stats import compact_ticket_stats, rebuild_ticket_stats, ticket_stats_drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compacta/verifica/recalcula ticket_stats")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--check", action="store_true", help="só compara agregados com a contagem real")
+    group.add_argument("--rebuild", action="store_true", help="recalcula os agregados a partir de tickets")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        if args.rebuild:
+            print(f"ticket_stats recalculada: {rebuild_ticket_stats(conn)} linhas")
+        elif args.check:
+            drift = ticket_stats_drift(conn)
+            for status, aggregated, actual in drift:
+                print(f"{status.value}: agregado={aggregated} real={actual}", file=sys.stderr)
+            if drift:
+                sys.exit(1)
+            print("ticket_stats confere com tickets")
+        else:
+            before, after = compact_ticket_stats(conn)
+            print(f"ticket_stats compactada: {before} -> {after} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Anexos: armazenamento por sha256 com dedup e download com ETag/304 e Range (inclusive os antigos)."""
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import storage
+from app.main import app
+from app.models import Attachment, AttachmentBlob
+from app.security import create_token
+from app.storage import LocalStorage, blob_key
+
+
+@pytest.fixture
+def client(agent):
+    token = create_token(user_id=str(agent.id), role="agent")
+    return TestClient(app, headers={"Authorization": f"Bearer {token}"})
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    backend = LocalStorage(tmp_path / "uploads")
+    monkeypatch.setattr(storage, "_storage", backend)
+    return backend
+
+
+def test_store_is_content_addressed(tmp_path):
+    backend = LocalStorage(tmp_path)
+    content = b"log do spooler\n" * 1000
+    digest = hashlib.sha256(content).hexdigest()
+
+    first = asyncio.run(backend.store(io.BytesIO(content)))
+    assert (first.digest, first.size, first.path, first.created) == (digest, len(content), blob_key(digest), True)
+    assert backend.path_for(first.path).read_bytes() == content
+
+    again = asyncio.run(backend.store(io.BytesIO(content)))
+    assert again.created is False
+    assert again.path == first.path
+    # o temporário da segunda gravação foi descartado, não ficou no staging
+    assert not list((tmp_path / "blobs").glob(".tmp-*"))
+
+
+def test_upload_dedups_and_downloads_by_digest(client, db, make_ticket, local_storage):
+    content = b"%PDF-1.4 fatura"
+    digest = hashlib.sha256(content).hexdigest()
+    uploaded = []
+    for _ in range(2):
+        ticket = make_ticket()
+        resp = client.post(f"/tickets/{ticket.id}/attachments", files={"file": ("fatura.pdf", content, "application/pdf")})
+        assert resp.status_code == 201
+        uploaded.append((ticket.id, resp.json()))
+
+    assert {att["digest"] for _, att in uploaded} == {digest}
+    assert db.get(AttachmentBlob, digest).ref_count >= 2
+    assert local_storage.path_for(blob_key(digest)).read_bytes() == content
+
+    ticket_id, att = uploaded[0]
+    resp = client.get(f"/tickets/{ticket_id}/attachments/{att['id']}")
+    assert resp.status_code == 200
+    assert resp.content == content
+    assert resp.headers["etag"] == f'"{digest}"'
+
+
+@pytest.fixture
+def legacy_attachment(db, make_ticket, tmp_path):
+    # anexo de antes do armazenamento por hash: sem digest, `path` aponta direto para o arquivo
+    file = tmp_path / "relatorio.txt"
+    file.write_bytes(b"0123456789")
+    ticket = make_ticket()
+    att = Attachment(ticket_id=ticket.id, filename="relatorio.txt", mime="text/plain", path=str(file), size=10)
+    db.add(att)
+    db.commit()
+    return att, file
+
+
+def test_legacy_attachment_download(client, legacy_attachment):
+    att, _ = legacy_attachment
+    url = f"/tickets/{att.ticket_id}/attachments/{att.id}"
+
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert resp.content == b"0123456789"
+    etag = resp.headers["etag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    part = client.get(url, headers={"Range": "bytes=2-4"})
+    assert part.status_code == 206
+    assert part.content == b"234"
+
+
+def test_legacy_attachment_etag_changes_when_file_is_rewritten(client, legacy_attachment):
+    att, file = legacy_attachment
+    url = f"/tickets/{att.ticket_id}/attachments/{att.id}"
+    etag = client.get(url).headers["etag"]
+
+    file.write_bytes(b"conteudo novo")
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.content == b"conteudo novo"
+
+
+def test_legacy_attachment_missing_file(client, legacy_attachment):
+    att, file = legacy_attachment
+    file.unlink()
+    resp = client.get(f"/tickets/{att.ticket_id}/attachments/{att.id}")
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Attachment file missing"
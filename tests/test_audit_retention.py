@@ -0,0 +1,38 @@
+"""Criação de partições de ticket_audit com linhas do mês já caídas na partição default."""
+from datetime import date
+
+from sqlalchemy import text
+
+from app.audit_retention import DEFAULT_PARTITION, ensure_partitions_between, list_partitions, partition_name
+from app.routes.tickets import _create_ticket
+from app.schemas import TicketCreate
+
+# mês longe o bastante para nenhuma execução do job ter criado a partição
+MONTH = date(2099, 1, 1)
+
+
+def test_stray_rows_move_to_new_partition(db, database):
+    ticket = _create_ticket(db, TicketCreate(
+        title="Evento fora de partição", description="-", requester_name="Cliente",
+        requester_email="cliente@example.com",
+    ))
+    name = partition_name(MONTH)
+    with database.begin() as conn:
+        assert MONTH not in list_partitions(conn)
+        conn.execute(text(
+            "INSERT INTO ticket_audit (id, ticket_id, event_type, payload, created_at) "
+            "VALUES (gen_random_uuid(), :tid, 'message_added', '{}', '2099-01-15 12:00:00+00')"
+        ), {"tid": ticket.id})
+    try:
+        with database.begin() as conn:
+            assert ensure_partitions_between(conn, MONTH, MONTH) == [name]
+        with database.connect() as conn:
+            assert list_partitions(conn)[MONTH] == name
+            assert conn.execute(text(f"SELECT count(*) FROM {name}")).scalar_one() == 1
+            assert conn.execute(text(
+                f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE created_at >= '2099-01-01'"
+            )).scalar_one() == 0
+    finally:
+        with database.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= '2099-01-01'"))
@@ -0,0 +1,41 @@
+"""AuditWriter (AUDIT_MODE=queue) sem banco: `_write` trocado por uma gravação lenta em memória."""
+import asyncio
+import time
+
+from app.audit import AuditWriter
+
+
+def _slow_writer(written: list) -> AuditWriter:
+    writer = AuditWriter(batch_size=1, flush_interval=0, queue_size=1, enqueue_timeout=0.2)
+
+    def write(batch):
+        time.sleep(0.1)
+        written.extend(batch)
+
+    writer._write = write
+    return writer
+
+
+def test_submit_on_event_loop_does_not_block():
+    written = []
+    writer = _slow_writer(written)
+    rows = [{"n": i} for i in range(5)]
+
+    async def commit():
+        # o after_commit roda no loop com DB_ASYNC: fila cheia não pode segurar o loop
+        start = time.perf_counter()
+        writer.submit(rows)
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(commit())
+    writer.stop()
+    assert elapsed < 0.05
+    assert sorted(r["n"] for r in written) == list(range(5))
+
+
+def test_submit_off_loop_keeps_backpressure():
+    written = []
+    writer = _slow_writer(written)
+    writer.submit([{"n": i} for i in range(5)])
+    writer.stop()
+    assert sorted(r["n"] for r in written) == list(range(5))
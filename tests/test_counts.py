@@ -0,0 +1,93 @@
+"""Cache das contagens do GET /tickets (total_mode=exact) e o TTLCache por trás dele."""
+from types import SimpleNamespace
+
+import pytest
+
+from app import cache as cache_module
+from app.cache import TTLCache
+from app.counts import count_cache, invalidate_counts
+from app.db import count_queries
+from app.routes.tickets import _build_filters, _count_tickets, _filter_key
+from app.schemas import TicketStatus
+from tests.conftest import unique_email
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # só o relógio do TTLCache: o resto do processo (pool, SQLAlchemy) segue no tempo real
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_ttl_cache_hit_and_expiry(clock):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("k", 42)
+    clock[0] += 9.9
+    assert cache.get("k") == 42
+    clock[0] += 0.2
+    assert cache.get("k") is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_exact_count_is_cached_until_ttl(db, make_ticket, clock):
+    email = unique_email()
+    make_ticket(requester_email=email)
+    filters = _build_filters(None, None, None, False, email)
+    key = _filter_key(None, None, None, False, email)
+    count_cache.pop(key)
+
+    with count_queries(keep_statements=True) as first:
+        assert _count_tickets(db, filters, key, "exact") == (1, "exact")
+    assert first.count == 1
+
+    with count_queries() as cached:
+        assert _count_tickets(db, filters, key, "exact") == (1, "exact")
+    assert cached.count == 0  # veio do cache
+
+    clock[0] += count_cache.ttl + 1
+    with count_queries() as expired:
+        assert _count_tickets(db, filters, key, "exact") == (1, "exact")
+    assert expired.count == 1
+
+
+def _key(q=None, status=None, assignee_id=None):
+    return (q, status, assignee_id, False, None)
+
+
+def test_invalidate_counts_drops_only_affected_statuses():
+    keys = {
+        "all": _key(),
+        "open": _key(status="open"),
+        "resolved": _key(status="resolved"),
+        "search_open": _key(q="senha", status="open"),
+        "search_closed": _key(q="senha", status="closed"),
+        "search_all": _key(q="senha"),
+    }
+    count_cache.clear()
+    for key in keys.values():
+        count_cache.set(key, 1)
+
+    invalidate_counts([TicketStatus.open, None])
+    left = {name for name, key in keys.items() if count_cache.get(key) is not None}
+    assert left == {"resolved", "search_closed"}
+
+
+def test_message_invalidates_only_search_counts():
+    keys = {"all": _key(), "open": _key(status="open"), "search_open": _key(q="senha", status="open"),
+            "search_all": _key(q="senha"), "search_closed": _key(q="senha", status="closed")}
+    count_cache.clear()
+    for key in keys.values():
+        count_cache.set(key, 1)
+
+    invalidate_counts([TicketStatus.open], search_only=True)
+    left = {name for name, key in keys.items() if count_cache.get(key) is not None}
+    assert left == {"all", "open", "search_closed"}
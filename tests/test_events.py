@@ -0,0 +1,47 @@
+"""Filtro das assinaturas do change feed (sem banco: eventos no formato do NOTIFY)."""
+import uuid
+
+from app.events import Subscription
+
+TICKET = str(uuid.uuid4())
+AGENT_A = str(uuid.uuid4())
+AGENT_B = str(uuid.uuid4())
+
+
+def _event(event_type, status="open", assignee_id=None, payload=None):
+    return {
+        "ticket_id": TICKET,
+        "event_type": event_type,
+        "status": status,
+        "assignee_id": assignee_id,
+        "payload": payload or {},
+    }
+
+
+def test_matches_current_values():
+    sub = Subscription(None, "open", None)
+    assert sub.matches(_event("message_added", status="open"))
+    assert not sub.matches(_event("message_added", status="resolved"))
+
+
+def test_status_change_reaches_subscriber_of_old_status():
+    # o ticket sai do filtro: open -> resolved ainda chega para quem assiste status=open
+    event = _event(
+        "status_changed", status="resolved", payload={"from": "TicketStatus.open", "to": "TicketStatus.resolved"}
+    )
+    assert Subscription(None, "open", None).matches(event)
+    assert Subscription(None, "resolved", None).matches(event)
+    assert not Subscription(None, "closed", None).matches(event)
+
+
+def test_assignee_change_reaches_subscriber_of_old_assignee():
+    event = _event("assignee_changed", assignee_id=AGENT_B, payload={"from": AGENT_A, "to": AGENT_B})
+    assert Subscription(None, None, uuid.UUID(AGENT_A)).matches(event)
+    assert Subscription(None, None, uuid.UUID(AGENT_B)).matches(event)
+    assert not Subscription(None, None, uuid.uuid4()).matches(event)
+
+
+def test_old_value_only_counts_for_its_own_event_type():
+    # um "from" de outro tipo de evento não é status/assignee antigo
+    event = _event("message_added", status="resolved", payload={"from": "open"})
+    assert not Subscription(None, "open", None).matches(event)
@@ -0,0 +1,33 @@
+"""Planos da listagem (GET /tickets) usam os índices esperados, sem Sort.
+
+Reaproveita `bench.explain.check` com seq scan/sort desligados na sessão: confere que o índice
+*serve* à query mesmo num banco de teste pequeno.
+"""
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.schemas import TicketStatus
+from bench.explain import SOME_CURSOR, _list, check
+
+
+@pytest.fixture
+def conn(database):
+    with database.connect() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        conn.execute(text("SET LOCAL enable_sort = off"))
+        yield conn
+        conn.rollback()
+
+
+@pytest.mark.parametrize("stmt, expected", [
+    (_list(status=TicketStatus.in_progress), "ix_tickets_status_created_at_id"),
+    (_list(status=TicketStatus.resolved, after=SOME_CURSOR), "ix_tickets_status_created_at_id"),
+    (_list(assignee_id=uuid.UUID(int=1)), "ix_tickets_assignee_id_created_at_id"),
+    (_list(assignee_id=uuid.UUID(int=1), after=SOME_CURSOR), "ix_tickets_assignee_id_created_at_id"),
+    (_list(status=TicketStatus.open, unassigned=True), "ix_tickets_triage_queue"),
+], ids=["status", "status cursor", "assignee", "assignee cursor", "triage queue"])
+def test_list_filters_use_index(conn, stmt, expected):
+    ok, summary = check(conn, stmt, expected)
+    assert ok, f"esperava {expected} sem Sort: {summary}"
@@ -0,0 +1,20 @@
+"""Rótulos de rota das métricas HTTP (sem banco: parâmetros inválidos param na validação, 422)."""
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.main import app
+
+
+def _routes_seen() -> set[str]:
+    return {line.split('route="')[1].split('"')[0] for line in metrics.REQUESTS.render() if 'route="' in line}
+
+
+def test_route_label_includes_router_prefix():
+    client = TestClient(app)
+    assert client.get("/tickets", params={"limit": "x"}).status_code == 422
+    assert client.get("/tickets/nao-e-uuid").status_code == 422
+    assert client.get("/nao-existe").status_code == 404
+
+    seen = _routes_seen()
+    assert {"/tickets", "/tickets/{ticket_id}", "unmatched"} <= seen
+    assert "" not in seen and "/{ticket_id}" not in seen
@@ -0,0 +1,41 @@
+"""Busca de tickets pelo e-mail do solicitante sem diferenciar maiúsculas (coluna gerada `requester_email_lc`)."""
+from app.models import Ticket
+from app.routes.tickets import _list_tickets, _lookup_tickets, _normalize_email, _update_status
+from app.schemas import TicketLookupRequest, TicketStatus, TicketStatusUpdate
+from tests.conftest import unique_email
+
+
+def test_normalize_email():
+    assert _normalize_email("  Maria.Silva@Example.COM ") == "maria.silva@example.com"
+
+
+def test_generated_column_is_lower_case(db, make_ticket):
+    email = unique_email()
+    ticket = make_ticket(requester_email=email.upper())
+    assert db.get(Ticket, ticket.id).requester_email_lc == email
+
+
+def test_list_filter_ignores_case(db, make_ticket):
+    email = unique_email()
+    ticket = make_ticket(requester_email=email.upper())
+    page = _list_tickets(db, None, None, None, False, f" {email.title()} ", 1, 10, None, "none")
+    assert [item["id"] for item in page["items"]] == [ticket.id]
+
+
+def test_lookup_groups_by_normalized_email(db, make_ticket):
+    email, other, nobody = unique_email(), unique_email(), unique_email()
+    older = make_ticket(requester_email=email.upper())
+    newer = make_ticket(requester_email=email)
+    closed = make_ticket(requester_email=other)
+    _update_status(db, closed.id, TicketStatusUpdate(status=TicketStatus.closed))
+
+    out = _lookup_tickets(db, TicketLookupRequest(emails=[email.title(), other, nobody, email, "  "]))
+    # um resultado por e-mail distinto, na ordem pedida; o fechado fica de fora do default
+    assert [r.email for r in out.results] == [email, other, nobody]
+    assert [t.id for t in out.results[0].tickets] == [newer.id, older.id]
+    assert out.results[1].tickets == [] and out.results[2].tickets == []
+
+    limited = _lookup_tickets(db, TicketLookupRequest(emails=[email], limit_per_email=1))
+    assert [t.id for t in limited.results[0].tickets] == [newer.id]
+    closed_only = _lookup_tickets(db, TicketLookupRequest(emails=[other], statuses=[TicketStatus.closed]))
+    assert [t.id for t in closed_only.results[0].tickets] == [closed.id]
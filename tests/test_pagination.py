@@ -0,0 +1,41 @@
+"""Paginação por cursor (keyset) do GET /tickets."""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.pagination import decode_cursor, encode_cursor
+from app.routes.tickets import _list_tickets
+from tests.conftest import unique_email
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    ticket_id = uuid.uuid4()
+    cursor = encode_cursor(created_at, ticket_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, ticket_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "não-é-base64", encode_cursor(datetime.now(timezone.utc), uuid.uuid4())[:-4]])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_cursor_pages_cover_every_ticket_once(db, make_ticket):
+    email = unique_email()
+    created = {make_ticket(requester_email=email).id for _ in range(5)}
+
+    seen, after = [], None
+    while True:
+        page = _list_tickets(db, None, None, None, False, email, 1, 2, after, "none")
+        seen += [item["id"] for item in page["items"]]
+        if page["next_cursor"] is None:
+            break
+        after = decode_cursor(page["next_cursor"])
+
+    assert len(seen) == len(created) and set(seen) == created
+    # mais recentes primeiro, na mesma ordem que uma página única com todos
+    single = _list_tickets(db, None, None, None, False, email, 1, 10, None, "none")
+    assert seen == [item["id"] for item in single["items"]]
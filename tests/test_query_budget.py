@@ -0,0 +1,77 @@
+"""Orçamento de queries das escritas de ticket (caminhos com UPDATE/INSERT ... RETURNING).
+
+Chama as funções síncronas das rotas (as mesmas que o `run_db` executa) na thread do teste, onde o
+`query_budget` enxerga as queries; BEGIN/COMMIT não contam.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db import count_queries, query_budget
+from app.models import Ticket
+from app.routes.tickets import _add_message, _create_ticket, _update_assignee, _update_status
+from app.schemas import (
+    TicketAssigneeUpdate, TicketCreate, TicketMessageCreate, TicketStatus, TicketStatusUpdate,
+)
+
+
+def _new_ticket(db):
+    return _create_ticket(db, TicketCreate(
+        title="Impressora não imprime",
+        description="Fila travada desde ontem",
+        requester_name="Cliente",
+        requester_email="cliente@example.com",
+    ))
+
+
+def test_create_ticket_budget(db):
+    # INSERT ... RETURNING do ticket + INSERT da auditoria
+    with query_budget(2):
+        ticket = _new_ticket(db)
+    assert ticket.number is not None
+    assert ticket.status == TicketStatus.open
+
+
+def test_update_status_budget(db):
+    ticket = _new_ticket(db)
+    # UPDATE ... RETURNING (com o valor antigo) + INSERT da auditoria
+    with query_budget(2):
+        out = _update_status(db, ticket.id, TicketStatusUpdate(status=TicketStatus.in_progress))
+    assert out.status == TicketStatus.in_progress
+
+
+def test_update_assignee_budget(db, agent):
+    ticket = _new_ticket(db)
+    agent_id = agent.id
+    # fora do identity map, a checagem do responsável vai ao banco como numa requisição de verdade
+    db.expunge(agent)
+    # SELECT do responsável + UPDATE ... RETURNING + INSERT da auditoria
+    with query_budget(3) as counter:
+        out = _update_assignee(db, ticket.id, TicketAssigneeUpdate(assignee_id=agent_id))
+    assert counter.count == 3
+    assert out.id == ticket.id
+
+    db.expire_all()
+    assert db.get(Ticket, ticket.id).assignee_id == agent_id
+
+
+def test_add_message_budget(db, agent):
+    ticket = _new_ticket(db)
+    # UPDATE ... RETURNING de updated_at + checagem do autor + INSERT da mensagem + INSERT da auditoria
+    with query_budget(4):
+        msg = _add_message(db, ticket.id, TicketMessageCreate(author_id=agent.id, body="Reiniciei o spooler"))
+    assert msg.author_id == agent.id
+
+
+def test_statements_kept_only_for_budget():
+    # os listeners de contagem valem para qualquer Engine: SQLite em memória basta aqui
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        with count_queries("GET /tickets") as counter:
+            conn.execute(text("SELECT 1"))
+        assert counter.count == 1
+        assert counter.statements is None  # por requisição só o número e o tempo
+
+        with pytest.raises(AssertionError, match="SELECT 2"):
+            with query_budget(1):
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
@@ -0,0 +1,30 @@
+"""Cache de respostas em memória (sem banco)."""
+import uuid
+
+from app.response_cache import MemoryResponseCache
+from app.schemas import TicketStatus
+
+
+def test_memory_cache_has_no_list_version():
+    # contadores por processo não veem escritas de outros workers: sem ETag de lista por versão
+    cache = MemoryResponseCache(maxsize=16, ttl=30)
+    assert cache.list_version(None) is None
+    assert cache.list_version(TicketStatus.open) is None
+
+
+def test_set_detail_skipped_after_invalidate():
+    cache = MemoryResponseCache(maxsize=16, ttl=30)
+    ticket_id = uuid.uuid4()
+
+    version = cache.detail_version(ticket_id)
+    cache.set_detail(ticket_id, "v", ("etag-1", b"{}"), version)
+    assert cache.get_detail(ticket_id, "v") == ("etag-1", b"{}")
+
+    # leitura do banco antes da escrita, set_detail depois do invalidate: não pode ficar no cache
+    version = cache.detail_version(ticket_id)
+    cache.invalidate([ticket_id], [TicketStatus.open])
+    cache.set_detail(ticket_id, "v", ("etag-stale", b"{}"), version)
+    assert cache.get_detail(ticket_id, "v") is None
+
+    cache.set_detail(ticket_id, "v", ("etag-2", b"{}"), cache.detail_version(ticket_id))
+    assert cache.get_detail(ticket_id, "v") == ("etag-2", b"{}")
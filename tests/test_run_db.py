@@ -0,0 +1,46 @@
+"""`run_db`: o código ORM síncrono das rotas roda fora do event loop nos dois modos de sessão."""
+import asyncio
+import threading
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.db import run_db
+
+
+def _select_one(db: Session, thread_ids: list) -> int:
+    thread_ids.append(threading.get_ident())
+    return db.execute(text("SELECT 1")).scalar_one()
+
+
+def test_sync_session_runs_in_threadpool():
+    # Session comum: vai para o threadpool, como uma rota `def`
+    async def main():
+        threads = []
+        with Session(create_engine("sqlite://", connect_args={"check_same_thread": False})) as db:
+            result = await run_db(db, _select_one, threads)
+        return result, threads, threading.get_ident()
+
+    result, threads, loop_thread = asyncio.run(main())
+    assert result == 1
+    assert threads and threads[0] != loop_thread
+
+
+def test_async_session_runs_sync_code_via_run_sync(database):
+    # AsyncSession (asyncpg): mesma função síncrona, via run_sync, sem threadpool
+    url = database.url.set(drivername="postgresql+asyncpg")
+
+    async def main():
+        async_engine = create_async_engine(url)
+        threads = []
+        try:
+            async with AsyncSession(async_engine) as db:
+                result = await run_db(db, _select_one, threads)
+        finally:
+            await async_engine.dispose()
+        return result, threads, threading.get_ident()
+
+    result, threads, loop_thread = asyncio.run(main())
+    assert result == 1
+    assert threads == [loop_thread]
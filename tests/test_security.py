@@ -0,0 +1,54 @@
+"""Cache de tokens JWT já verificados (sem banco)."""
+import time
+import uuid
+from types import SimpleNamespace
+
+import jwt
+import pytest
+
+from app import security
+from app.security import _decode_token, create_token
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Conta as chamadas reais ao jwt.decode."""
+    calls = []
+    real = jwt.decode
+
+    def counting(*args, **kwargs):
+        calls.append(args[0])
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting)
+    return calls
+
+
+def test_verified_token_is_cached(decodes):
+    token = create_token(user_id=str(uuid.uuid4()), role="agent")
+    first = _decode_token(token)
+    assert _decode_token(token) is first
+    assert decodes == [token]
+
+
+def test_cached_token_still_expires(decodes, monkeypatch):
+    token = create_token(user_id=str(uuid.uuid4()), role="agent")
+    user = _decode_token(token)
+    # o relógio passa do exp antes de o TTL do cache vencer: o cache não pode estender a validade
+    now = user.exp + 1
+    monkeypatch.setattr(security, "time", SimpleNamespace(time=lambda: now))
+    with pytest.raises(jwt.ExpiredSignatureError):
+        _decode_token(token)
+
+    # a entrada vencida saiu do cache: a próxima leitura verifica a assinatura de novo
+    now = time.time()
+    _decode_token(token)
+    assert decodes == [token, token]
+
+
+def test_invalid_token_is_not_cached(decodes):
+    token = jwt.encode({"user_id": "x", "role": "agent", "exp": int(time.time()) + 60}, "outra-chave", algorithm="HS256")
+    for _ in range(2):
+        with pytest.raises(jwt.InvalidSignatureError):
+            _decode_token(token)
+    assert decodes == [token, token]
@@ -0,0 +1,44 @@
+"""Agregados do GET /tickets/stats mantidos pelos triggers em ticket_stats."""
+from types import SimpleNamespace
+
+from app.routes.tickets import _update_assignee, _update_status
+from app.schemas import TicketAssigneeUpdate, TicketStatus, TicketStatusUpdate
+from app.stats import _Acc, compact_ticket_stats, ticket_stats_drift, ticket_stats_summary
+
+
+def _agent_stats(db, agent_id):
+    return next(a for a in ticket_stats_summary(db).by_assignee if a.assignee_id == agent_id)
+
+
+def test_summary_follows_ticket_writes(db, make_ticket, agent):
+    ticket = make_ticket()
+    _update_assignee(db, ticket.id, TicketAssigneeUpdate(assignee_id=agent.id))
+    stats = _agent_stats(db, agent.id)
+    assert (stats.count, stats.backlog) == (1, 1)
+    assert stats.by_status == {TicketStatus.open: 1}
+
+    _update_status(db, ticket.id, TicketStatusUpdate(status=TicketStatus.resolved))
+    stats = _agent_stats(db, agent.id)
+    assert (stats.count, stats.backlog) == (1, 0)
+    assert stats.by_status == {TicketStatus.resolved: 1}
+
+
+def test_compaction_keeps_totals(db, database, make_ticket):
+    make_ticket()
+    before = ticket_stats_summary(db)
+    db.rollback()  # solta o snapshot antes do LOCK da compactação
+    with database.connect() as conn:
+        compact_ticket_stats(conn)
+        assert ticket_stats_drift(conn) == []
+    after = ticket_stats_summary(db)
+    assert (after.total, after.backlog) == (before.total, before.backlog)
+    assert [s.count for s in after.by_status] == [s.count for s in before.by_status]
+
+
+def test_acc_averages():
+    acc = _Acc()
+    acc.add(SimpleNamespace(tickets=2, created_epoch_sum=100 + 300, responded=1, first_response_seconds_sum=60))
+    assert acc.avg_age(now=1000) == 800
+    assert acc.avg_first_response() == 60
+    assert _Acc().avg_age(now=1000) is None
+    assert _Acc().avg_first_response() is None
@@ -0,0 +1,64 @@
+"""Backends de armazenamento de anexos (sem banco)."""
+import asyncio
+import hashlib
+import importlib.util
+import io
+
+import pytest
+
+from app import storage
+from app.storage import LocalStorage, StorageBackend, blob_key, get_storage
+
+
+class MemoryStorage(StorageBackend):
+    """Backend mínimo: exercita o `store` padrão (hash, HEAD, put), o mesmo caminho do S3."""
+
+    def __init__(self):
+        self.blobs = {}
+        self.puts = 0
+
+    async def exists(self, key):
+        return key in self.blobs
+
+    async def put(self, key, src, size):
+        self.puts += 1
+        self.blobs[key] = src.read()
+        assert len(self.blobs[key]) == size
+
+    async def response(self, key, *, media_type, filename, headers, range_header):
+        raise NotImplementedError
+
+
+def test_default_store_skips_upload_of_existing_blob():
+    backend = MemoryStorage()
+    content = b"captura de tela"
+    digest = hashlib.sha256(content).hexdigest()
+
+    first = asyncio.run(backend.store(io.BytesIO(content)))
+    again = asyncio.run(backend.store(io.BytesIO(content)))
+    assert (first.created, again.created) == (True, False)
+    assert first.path == again.path == blob_key(digest)
+    assert backend.blobs == {blob_key(digest): content}
+    assert backend.puts == 1
+
+
+def test_get_storage_defaults_to_local(monkeypatch):
+    monkeypatch.setattr(storage, "_storage", None)
+    backend = get_storage()
+    assert isinstance(backend, LocalStorage)
+    assert get_storage() is backend  # uma instância por processo
+
+
+@pytest.mark.skipif(importlib.util.find_spec("boto3") is not None, reason="boto3 instalado")
+def test_s3_backend_requires_boto3(monkeypatch):
+    monkeypatch.setattr(storage, "_storage", None)
+    monkeypatch.setattr(storage.settings, "storage_backend", "s3")
+    with pytest.raises(RuntimeError, match="boto3"):
+        get_storage()
+
+
+def test_local_missing_blob_is_404(tmp_path):
+    resp = asyncio.run(LocalStorage(tmp_path).response(
+        blob_key("0" * 64), media_type="text/plain", filename="x.txt", headers={}, range_header=None
+    ))
+    assert resp.status_code == 404
@@ -0,0 +1,52 @@
+"""Detalhe do ticket: projeção por `fields`, paginação das mensagens por cursor e ETag."""
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.db import query_budget
+from app.main import app
+from app.pagination import decode_cursor
+from app.routes.tickets import DETAIL_FIELDS, _add_message, _get_ticket
+from app.schemas import TicketMessageCreate
+
+
+def test_projection_skips_lists(db, make_ticket):
+    ticket = make_ticket(title="Só o título")
+    # sem messages/attachments em `fields`: só a query do ticket
+    with query_budget(1):
+        _, data = _get_ticket(db, ticket.id, frozenset({"id", "title"}), 50, None, "v", None)
+    assert data == {"id": ticket.id, "title": "Só o título"}
+
+
+def test_messages_paged_by_cursor(db, make_ticket, agent):
+    ticket = make_ticket()
+    for body in ("primeira", "segunda", "terceira"):
+        _add_message(db, ticket.id, TicketMessageCreate(author_id=agent.id, body=body))
+
+    _, page = _get_ticket(db, ticket.id, DETAIL_FIELDS, 2, None, "v", None)
+    assert [m["body"] for m in page["messages"]] == ["primeira", "segunda"]
+    assert page["messages_next_cursor"] is not None
+
+    after = decode_cursor(page["messages_next_cursor"])
+    _, rest = _get_ticket(db, ticket.id, DETAIL_FIELDS, 2, after, "v", None)
+    assert [m["body"] for m in rest["messages"]] == ["terceira"]
+    assert rest["messages_next_cursor"] is None
+
+
+def test_matching_etag_stops_after_first_query(db, make_ticket):
+    ticket = make_ticket()
+    etag, _ = _get_ticket(db, ticket.id, DETAIL_FIELDS, 50, None, "v", None)
+    with query_budget(1):
+        assert _get_ticket(db, ticket.id, DETAIL_FIELDS, 50, None, "v", etag) == (etag, None)
+    # outra variante (outros fields/página) tem outro ETag
+    other, _ = _get_ticket(db, ticket.id, frozenset({"id"}), 50, None, "id", None)
+    assert other != etag
+
+
+def test_bad_fields_and_cursor_are_rejected_before_the_database():
+    client = TestClient(app)
+    url = f"/tickets/{uuid.uuid4()}"
+    resp = client.get(url, params={"fields": "id,senha"})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Unknown fields: senha"
+    assert client.get(url, params={"messages_cursor": "nao-e-cursor"}).status_code == 400
@@ -0,0 +1,27 @@
+"""Números de ticket vindos da sequence `tickets_number_seq` (sem MAX(number) + 1)."""
+from sqlalchemy import select
+
+from app.db import query_budget
+from app.models import Ticket, allocate_ticket_numbers
+
+
+def test_created_tickets_get_increasing_numbers(make_ticket):
+    first = make_ticket()
+    second = make_ticket()
+    assert first.number >= 1000  # a sequence começa em 1000
+    assert second.number > first.number
+
+
+def test_allocate_numbers_in_one_round_trip(db):
+    with query_budget(1):
+        numbers = allocate_ticket_numbers(db, 5)
+    assert len(set(numbers)) == 5
+    assert numbers == sorted(numbers)
+    # números reservados não colidem com os que já estão em uso
+    assert db.execute(select(Ticket.id).where(Ticket.number.in_(numbers))).first() is None
+    db.rollback()
+
+
+def test_allocate_nothing_skips_the_database(db):
+    with query_budget(0):
+        assert allocate_ticket_numbers(db, 0) == []